@@ -0,0 +1,172 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from timeline import RUN_DTYPE, STATUS_CODES, STATUS_NAMES
+
+FOCUS = STATUS_CODES["focus"]
+TIRED = STATUS_CODES["tired"]
+MIN_HOUR_SECONDS = 15 * 60  # Ignore hours of the day with less data than this
+
+
+class TimelineArchive:
+    """All recorded sessions as flat NumPy columns.
+
+    Runs from every session are concatenated into one structured array with
+    a parallel ``session`` index column, so every metric is a handful of
+    array operations. The concatenation is cached in ``all_runs.npz`` and
+    only sessions added to index.jsonl since the last load are read.
+    """
+
+    def __init__(self, directory="timelines"):
+        self.directory = directory
+        self.index_path = os.path.join(directory, "index.jsonl")
+        self.cache_path = os.path.join(directory, "all_runs.npz")
+
+        self.sessions = []
+        self.runs = np.zeros(0, dtype=RUN_DTYPE)
+        self.session = np.zeros(0, dtype=np.int32)   # Run -> session number
+        self.starts = np.zeros(0, dtype=np.float64)  # Session number -> start epoch
+        self._index_stamp = None
+
+    def refresh(self):
+        """Loads new sessions if index.jsonl changed; returns True when data changed."""
+        try:
+            stat = os.stat(self.index_path)
+        except FileNotFoundError:
+            return False
+        stamp = (stat.st_size, stat.st_mtime)
+        if stamp == self._index_stamp:
+            return False
+        self._index_stamp = stamp
+
+        with open(self.index_path) as f:
+            sessions = [json.loads(line) for line in f if line.strip()]
+
+        if not self.sessions and os.path.exists(self.cache_path):
+            cached = np.load(self.cache_path)
+            known = int(cached["count"])
+            if known <= len(sessions):
+                self.runs, self.session = cached["runs"], cached["session"]
+                self.sessions = sessions[:known]
+
+        new = sessions[len(self.sessions):]
+        if new:
+            parts, owners = [self.runs], [self.session]
+            for number, meta in enumerate(new, start=len(self.sessions)):
+                try:
+                    runs = np.load(os.path.join(self.directory, f"{meta['id']}.npy"))
+                except (OSError, ValueError):
+                    runs = np.zeros(0, dtype=RUN_DTYPE)
+                parts.append(runs)
+                owners.append(np.full(len(runs), number, dtype=np.int32))
+            self.runs = np.concatenate(parts)
+            self.session = np.concatenate(owners)
+            self.sessions = sessions
+            np.savez(self.cache_path, runs=self.runs, session=self.session, count=len(sessions))
+
+        self.starts = np.array([s["start"] for s in self.sessions], dtype=np.float64)
+        return True
+
+
+def compute_report(archive):
+    """Focus metrics over every session, without per-run Python loops."""
+    runs, session = archive.runs, archive.session
+    n_sessions = len(archive.sessions)
+    if len(runs) == 0:
+        return {"sessions": n_sessions, "hours": 0.0}
+
+    status = runs["status"]
+    duration = runs["duration"].astype(np.float64)
+    offset = runs["offset"].astype(np.float64)
+    is_focus = status == FOCUS
+
+    # --- Focus ratio (overall + per session) ---
+    total = np.bincount(session, weights=duration, minlength=n_sessions)
+    focused = np.bincount(session, weights=duration * is_focus, minlength=n_sessions)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        per_session = np.where(total > 0, focused / total, np.nan)
+
+    # --- Distraction episodes: a non-focus run entered from focus or at session start ---
+    prev_status = np.empty_like(status)
+    prev_status[0] = FOCUS
+    prev_status[1:] = status[:-1]
+    session_start = np.ones(len(runs), dtype=bool)
+    session_start[1:] = session[1:] != session[:-1]
+    episode = ~is_focus & ((prev_status == FOCUS) | session_start)
+    by_type = np.bincount(status[episode], minlength=len(STATUS_NAMES))
+
+    # --- Time to refocus: from episode start to the next focus run of the same session ---
+    index = np.arange(len(runs))
+    focus_at = np.where(is_focus, index, len(runs))
+    next_focus = np.minimum.accumulate(focus_at[::-1])[::-1]
+    starts = index[episode]
+    ends = next_focus[starts]
+    valid = ends < len(runs)
+    valid[valid] = session[ends[valid]] == session[starts[valid]]
+    refocus = offset[ends[valid]] - offset[starts[valid]]
+
+    # --- Fatigue onset: first tired run per session ---
+    tired = np.flatnonzero(status == TIRED)
+    _, first = np.unique(session[tired], return_index=True)
+    onset = offset[tired[first]]
+
+    # --- Best time of day (local hour, focus-weighted) ---
+    utc_offset = time.localtime().tm_gmtoff
+    hour = (((archive.starts[session] + offset + utc_offset) // 3600) % 24).astype(np.int64)
+    hour_total = np.bincount(hour, weights=duration, minlength=24)
+    hour_focus = np.bincount(hour, weights=duration * is_focus, minlength=24)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        hour_ratio = np.where(hour_total >= MIN_HOUR_SECONDS, hour_focus / hour_total, np.nan)
+    best_hour = int(np.nanargmax(hour_ratio)) if np.isfinite(hour_ratio).any() else None
+
+    return {
+        "sessions": n_sessions,
+        "hours": float(total.sum() / 3600),
+        "focus_ratio": float(focused.sum() / total.sum()) if total.sum() else 0.0,
+        "median_session_focus": float(np.nanmedian(per_session)) if np.isfinite(per_session).any() else None,
+        "distractions": {STATUS_NAMES[code]: int(count) for code, count in enumerate(by_type)
+                         if code != FOCUS},
+        "median_refocus_s": float(np.median(refocus)) if len(refocus) else None,
+        "fatigue_sessions": int(len(onset)),
+        "median_fatigue_onset_min": float(np.median(onset) / 60) if len(onset) else None,
+        "best_hour": best_hour,
+        "focus_by_hour": [None if np.isnan(r) else round(float(r), 3) for r in hour_ratio],
+    }
+
+
+def format_report(report):
+    lines = [f"📊 {report['sessions']} sessions, {report['hours']:.1f} h recorded"]
+    if "focus_ratio" not in report:
+        return "\n".join(lines)
+
+    lines.append(f"Focus ratio: {report['focus_ratio']:.0%}")
+    if report["median_refocus_s"] is not None:
+        lines.append(f"Median time to refocus: {report['median_refocus_s']:.1f} s")
+    if report["median_fatigue_onset_min"] is not None:
+        lines.append(f"Fatigue onset (median): {report['median_fatigue_onset_min']:.0f} min "
+                     f"in {report['fatigue_sessions']} sessions")
+    if report["best_hour"] is not None:
+        lines.append(f"Best time of day: {report['best_hour']:02d}:00-{(report['best_hour'] + 1) % 24:02d}:00")
+    distractions = ", ".join(f"{name} {count}" for name, count in report["distractions"].items())
+    lines.append(f"Distractions: {distractions}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Focus analytics over recorded timelines")
+    parser.add_argument("--dir", default="timelines", help="Timeline directory (see timeline.py)")
+    parser.add_argument("--json", action="store_true", help="Print the raw report as JSON")
+    args = parser.parse_args()
+
+    archive = TimelineArchive(args.dir)
+    archive.refresh()
+    report = compute_report(archive)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,13 @@
-from flask import Flask, render_template, Response
+from flask import Flask, render_template, Response, request, jsonify
 import cv2
+import math
 import time
 import threading
-from modes import get_message
+from modes import MESSAGES, get_message
 from voice import speak
+from focus_state import FocusStateMachine, Status
+from pipeline import LatestValue
+from remote import AnalyzeBatcher, decode_frame
 
 app = Flask(__name__)
 
@@ -11,55 +15,242 @@ app = Flask(__name__)
 face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
 eye_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
 
-last_alert = 0
+# --- Stream defaults (overridable per viewer: /video_feed?width=320&quality=60&fps=10) ---
+STREAM_WIDTH = 640
+STREAM_QUALITY = 70
+STREAM_FPS = 15
+MIN_QUALITY = 35
+MIN_FPS = 2
+QUALITY_STEP = 10
+# A client is falling behind when sending one frame takes most of its frame budget
+BACKOFF_RATIO = 0.8
+RECOVER_RATIO = 0.3
+RECOVER_FRAMES = 30
 
-def gen_frames():
-    global last_alert
-    camera = cv2.VideoCapture(0)
-    
-    # Trackers
-    face_lost_start = None
-    eyes_lost_start = None
-
-    while True:
-        success, frame = camera.read()
-        if not success:
-            break
-        
-        frame = cv2.flip(frame, 1)
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = face_cascade.detectMultiScale(gray, 1.3, 5)
-
-        now = time.time()
-        status = "focus"
-
-        if len(faces) == 0:
-            if face_lost_start is None: face_lost_start = now
-            if (now - face_lost_start) > 2: status = "phone"
-        else:
-            face_lost_start = None
-            for (x, y, w, h) in faces:
-                # ROI for eyes
-                roi_gray = gray[y:y+h, x:x+w]
-                eyes = eye_cascade.detectMultiScale(roi_gray, 1.1, 5)
-                
-                if len(eyes) == 0:
-                    if eyes_lost_start is None: eyes_lost_start = now
-                    if (now - eyes_lost_start) > 3: status = "tired"
+
+class EncodedFrame:
+    """One analysed frame plus the JPEGs already encoded from it.
+
+    Clients ask for (width, quality); the first one to ask pays for the
+    resize + encode and everyone else with the same settings gets the
+    same bytes, so three viewers at default settings cost one imencode.
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+        self._lock = threading.Lock()
+        self._jpegs = {}  # (width, quality) -> bytes
+
+    def jpeg(self, width, quality):
+        key = (width, quality)
+        with self._lock:
+            data = self._jpegs.get(key)
+            if data is None:
+                image = self.frame
+                h, w = image.shape[:2]
+                if width and width < w:
+                    image = cv2.resize(image, (width, h * width // w), interpolation=cv2.INTER_AREA)
+                ok, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+                data = buffer.tobytes() if ok else None
+                self._jpegs[key] = data
+            return data
+
+
+class FrameBroadcaster:
+    """One camera + analysis loop shared by every /video_feed client.
+
+    The producer thread starts with the first subscriber and releases the
+    camera a moment after the last one leaves. Each producer run has its
+    own LatestValue slot, so a viewer never gets a frame from an earlier
+    run, and every client waits for a newer version than
+    the one it last sent, so a slow client simply skips frames instead of
+    queueing them or slowing the others down.
+
+    Frames are only JPEG-encoded when a client actually sends one, at that
+    client's size/quality (see EncodedFrame). A client whose socket can't
+    keep up steps its quality down, then its frame rate, and climbs back
+    once sends are quick again.
+    """
+
+    def __init__(self, source=0, idle_timeout=2.0, mode="asian_mom"):
+        self.source = source
+        self.mode = mode
+        self.idle_timeout = idle_timeout
+        self.frames = LatestValue()  # Slot of the current producer run
+        self.status = Status.FOCUS
+
+        self._lock = threading.Lock()
+        self._camera_lock = threading.Lock()  # Held by a producer while it owns the camera
+        self._clients = 0
+        self._thread = None
+
+    # --------------------------------
+    # Subscribers (one per request thread)
+    # --------------------------------
+    def stream(self, width=STREAM_WIDTH, quality=STREAM_QUALITY, fps=STREAM_FPS):
+        frames, producer = self._subscribe()
+        target_quality, target_fps = quality, fps
+        version = 0
+        dropped = 0
+        next_send = 0.0
+        send_avg = 0.0
+        calm = 0
+        try:
+            while True:
+                # Frame rate cap: don't even look at frames this client won't send
+                wait = next_send - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+
+                entry, new_version = frames.get(version, timeout=1.0)
+                if entry is None:
+                    if self._thread is not producer:
+                        break  # Camera gone (this run ended)
+                    continue
+                jpeg = entry.jpeg(width, quality)
+                if jpeg is None:
+                    continue
+                if version:
+                    dropped += new_version - version - 1
+                version = new_version
+
+                # The yield returns once the server has handed the bytes to the socket
+                started = time.monotonic()
+                yield (b'--frame\r\n'
+                       b'Content-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
+                sent = time.monotonic()
+                interval = 1.0 / fps
+                next_send = started + interval
+                send_avg = 0.7 * send_avg + 0.3 * (sent - started)
+
+                # --- Back-off: quality first, then frame rate; recover in reverse ---
+                if send_avg > interval * BACKOFF_RATIO:
+                    if quality > MIN_QUALITY:
+                        quality = max(MIN_QUALITY, quality - QUALITY_STEP)
+                    else:
+                        fps = max(MIN_FPS, fps * 0.75)
+                    send_avg = 0.0
+                    calm = 0
+                    print(f"🐢 Viewer falling behind: quality {quality}, {fps:.1f} fps")
+                elif send_avg < interval * RECOVER_RATIO and (quality, fps) != (target_quality, target_fps):
+                    calm += 1
+                    if calm >= RECOVER_FRAMES:
+                        if fps < target_fps:
+                            fps = min(target_fps, fps / 0.75)
+                        else:
+                            quality = min(target_quality, quality + QUALITY_STEP)
+                        calm = 0
                 else:
-                    eyes_lost_start = None
+                    calm = 0
+        finally:
+            self._unsubscribe()
+            print(f"👋 Viewer left ({dropped} frames skipped for it)")
+
+    def _subscribe(self):
+        """Registers a viewer; returns the (frames, thread) of the producer run it watches."""
+        with self._lock:
+            self._clients += 1
+            if self._thread is None:
+                self.frames = LatestValue()
+                self._thread = threading.Thread(target=self._produce, args=(self.frames,), daemon=True)
+                self._thread.start()
+            return self.frames, self._thread
+
+    def _unsubscribe(self):
+        with self._lock:
+            self._clients -= 1
+
+    # --------------------------------
+    # Producer (single thread, single camera)
+    # --------------------------------
+    def _produce(self, frames):
+        # A previous run may still be releasing the camera
+        with self._camera_lock:
+            self._run_camera(frames)
+
+    def _run_camera(self, frames):
+        camera = cv2.VideoCapture(self.source)
+        print("🎥 Shared camera opened")
+
+        # Same time-based status logic as the desktop StudyDetector
+        state = FocusStateMachine()
+        idle_since = None
+
+        try:
+            while True:
+                with self._lock:
+                    if self._clients > 0:
+                        idle_since = None
+                    elif idle_since is None:
+                        idle_since = time.monotonic()
+                    elif time.monotonic() - idle_since > self.idle_timeout:
+                        # Decided under the same lock _subscribe checks, so the next viewer starts a new run
+                        self._thread = None
+                        break
+
+                success, frame = camera.read()
+                if not success:
+                    break
+
+                frame = cv2.flip(frame, 1)
+                self.status = analyze_frame(frame, state)
 
-        # Voice Trigger
-        if (now - last_alert) > 10:
-            speak(get_message("asian_mom", "YOU DUMB DUMB"))
-            last_alert = now
-            print("DEBUG: Alert triggered for status:", status)
+                # Voice warning for the debounced status (once for everyone, not once per viewer);
+                # the status category's cooldown in the voice service keeps it from repeating
+                if self.status != Status.FOCUS:
+                    speak(get_message(self.mode, self.status.key), self.status.key)
+
+                # Encoding happens lazily per viewer; nobody watching means no encode
+                if self._clients > 0:
+                    frames.put(EncodedFrame(frame))
+        except Exception as e:
+            print(f"❌ Stream Error: {e}")
+        finally:
+            # Next subscriber starts a fresh producer (unless it already has after an idle exit)
+            with self._lock:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+            camera.release()
+            print("📴 Shared camera released")
+
+
+def analyze_frame(frame, state):
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    faces = face_cascade.detectMultiScale(gray, 1.3, 5)
+
+    eyes_closed = None
+    if len(faces) > 0:
+        # ROI for eyes (main face only)
+        (x, y, w, h) = faces[0]
+        roi_gray = gray[y:y+h, x:x+w]
+        eyes = eye_cascade.detectMultiScale(roi_gray, 1.1, 5)
+        eyes_closed = len(eyes) == 0
+
+    # No YOLO in web mode: faces stand in for people, phones aren't visible
+    return state.update(len(faces), False, eyes_closed, time.monotonic())
+
+
+broadcaster = FrameBroadcaster()
+
+# Loaded on the first /analyze call so camera-only use doesn't pay for YOLO
+_batcher = None
+_batcher_error = None
+_batcher_lock = threading.Lock()
+MAX_ITEMS_PER_REQUEST = 8
+
+
+def get_batcher():
+    """The shared AnalyzeBatcher, or None if the detector failed to load (see _batcher_error)."""
+    global _batcher, _batcher_error
+    with _batcher_lock:
+        if _batcher is None and _batcher_error is None:
+            try:
+                _batcher = AnalyzeBatcher()
+            except Exception as e:
+                print(f"❌ Remote Analysis Error: {e}")
+                _batcher_error = str(e)
+        return _batcher
 
-        # Encode for web
-        ret, buffer = cv2.imencode('.jpg', frame)
-        frame_bytes = buffer.tobytes()
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
 
 @app.route('/')
 def index():
@@ -67,7 +258,94 @@ def index():
 
 @app.route('/video_feed')
 def video_feed():
-    return Response(gen_frames(), mimetype='multipart/x-mixed-replace; boundary=frame')
+    width = request.args.get('width', STREAM_WIDTH, type=int)
+    quality = request.args.get('quality', STREAM_QUALITY, type=int)
+    fps = request.args.get('fps', STREAM_FPS, type=float)
+    stream = broadcaster.stream(width=max(80, min(width, 1920)),
+                                quality=max(MIN_QUALITY, min(quality, 95)),
+                                fps=max(MIN_FPS, min(fps, 30.0)))
+    return Response(stream, mimetype='multipart/x-mixed-replace; boundary=frame')
+
+@app.route('/remote')
+def remote():
+    return render_template('remote.html')
+
+@app.route('/analyze', methods=['POST'])
+def analyze():
+    """Status for frames or features captured in the student's browser.
+
+    Body: {"session": id, "mode": "asian_mom",
+           "frames": [{"t": ms, "image": "data:image/jpeg;base64,..."}, ...]
+           or "features": [{"t": ms, "persons": 1, "phone": false, "eyes_closed": false}, ...]}
+    The older {"status": ..., "mode": ...} form just speaks the message on the server.
+    """
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify(error="Body must be a JSON object"), 400
+    mode = data.get('mode')
+    mode = mode if isinstance(mode, str) and mode in MESSAGES else 'asian_mom'
+
+    if 'frames' not in data and 'features' not in data:
+        status = data.get('status')
+        if not status:
+            return jsonify(error="Send frames, features or a status"), 400
+        if not isinstance(status, str):
+            return jsonify(error="'status' must be a string"), 400
+        speak(get_message(mode, status), status)
+        return jsonify(status=status)
+
+    frames = data.get('frames') or []
+    features = data.get('features') or []
+    if not isinstance(frames, list) or not isinstance(features, list):
+        return jsonify(error="'frames' and 'features' must be lists"), 400
+    if not all(isinstance(entry, dict) for entry in frames + features):
+        return jsonify(error="Every frame and feature entry must be an object"), 400
+    if not all(_valid_features(entry) for entry in features):
+        return jsonify(error="Feature 'persons' must be a finite number and 'eyes_closed' a boolean"), 400
+
+    items = []
+    for entry in frames[:MAX_ITEMS_PER_REQUEST]:
+        frame = decode_frame(entry.get('image'))
+        if frame is not None:
+            items.append((_client_time(entry), frame, None))
+    for entry in features[:MAX_ITEMS_PER_REQUEST]:
+        items.append((_client_time(entry), None, entry))
+    if not items:
+        return jsonify(error="Nothing decodable in the request"), 400
+    items.sort(key=lambda item: item[0])
+
+    batcher = get_batcher()
+    if batcher is None:
+        return jsonify(error=f"Remote analysis unavailable: {_batcher_error}"), 503
+    # Features are judged without YOLO; only frames need the model
+    if batcher.model_error and any(frame is not None for (_, frame, _) in items):
+        return jsonify(error=f"Detector unavailable: {batcher.model_error}"), 503
+    session = str(data.get('session') or request.remote_addr)
+    try:
+        results = batcher.submit(session, items)
+    except RuntimeError as e:
+        return jsonify(error=f"Analysis failed: {e}"), 500
+    if results is None:
+        return jsonify(error="Analysis timed out"), 503
+
+    status = results[-1]['status']
+    message = get_message(mode, status) if status != 'focus' else None
+    return jsonify(session=session, status=status, message=message, results=results)
+
+
+def _client_time(entry):
+    """Browser capture time in seconds (performance.now() ms); server clock if missing."""
+    t = entry.get('t')
+    return t / 1000 if isinstance(t, (int, float)) and not isinstance(t, bool) else time.monotonic()
+
+
+def _valid_features(entry):
+    persons = entry.get('persons')
+    if persons is not None and (isinstance(persons, bool) or not isinstance(persons, (int, float))
+                                or not math.isfinite(persons)):
+        return False
+    eyes_closed = entry.get('eyes_closed')
+    return eyes_closed is None or isinstance(eyes_closed, bool)
 
 @app.route('/test_voice')
 def say_something():
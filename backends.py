@@ -0,0 +1,486 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+# Default model files per backend. The ONNX/OpenVINO ones are exports of the
+# same YOLOv4-tiny network (see export notes in OnnxRuntimeBackend).
+MODEL_FILES = {
+    "opencv": ("yolov4-tiny.weights", "yolov4-tiny.cfg"),
+    "onnxruntime": "yolov4-tiny.onnx",
+    "onnxruntime-int8": "yolov4-tiny-int8.onnx",
+    "openvino": "yolov4-tiny.xml",
+    "openvino-int8": "yolov4-tiny-int8.xml",
+}
+
+INPUT_SIZES = (160, 224, 320, 416, 608)  # 160/224 are meant for the cheap tier of DetectionCascade
+
+MODEL_CACHE_DIR = os.path.join(".cache", "models")
+
+
+class DetectorBackend:
+    """Common interface for the YOLO object detector.
+
+    detect() mirrors cv2.dnn_DetectionModel.detect: it returns parallel
+    (class_ids, scores, boxes) arrays with boxes as (x, y, w, h) in frame
+    pixels, so StudyDetector does not care which runtime produced them.
+    """
+
+    name = "base"
+
+    def __init__(self, size=416, threads=None):
+        if size not in INPUT_SIZES:
+            raise ValueError(f"Input size must be one of {INPUT_SIZES}, got {size}")
+        self.size = size
+        self.threads = threads
+        self.cache = None  # ModelCacheEntry, set by create_backend
+        self.cache_hit = False
+
+    def warm_up(self, runs=2):
+        """Runs dummy frames through the network so the first real frame gets steady-state latency.
+
+        Returns the latency (ms) of each run; the first one pays for memory
+        allocation and kernel selection.
+        """
+        frame = np.zeros((self.size, self.size, 3), dtype=np.uint8)
+        latencies = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            self.detect(frame)
+            latencies.append((time.perf_counter() - start) * 1000)
+        if self.cache is not None:
+            self.cache.update(warmup_ms=[round(ms, 1) for ms in latencies])
+        return latencies
+
+    def class_names(self, path="coco.names"):
+        """Labels for the class ids detect() returns, read from the cache entry while the file is unchanged."""
+        stat = os.stat(path)
+        source = [os.path.abspath(path), stat.st_size, stat.st_mtime_ns]
+        if self.cache is not None and self.cache.manifest.get("classes_source") == source:
+            return self.cache.manifest["classes"]
+        with open(path, "r") as f:
+            classes = [line.strip() for line in f.readlines()]
+        if self.cache is not None:
+            self.cache.update(classes=classes, classes_source=source)
+        return classes
+
+    def detect(self, frame, conf_threshold=0.5, nms_threshold=0.4):
+        raise NotImplementedError
+
+    def detect_batch(self, frames, conf_threshold=0.5, nms_threshold=0.4):
+        """detect() for several frames at once; returns one (class_ids, scores, boxes) per frame."""
+        return [self.detect(frame, conf_threshold, nms_threshold) for frame in frames]
+
+    def make_blob(self, frame):
+        return cv2.dnn.blobFromImage(frame, 1/255, (self.size, self.size), swapRB=True, crop=False)
+
+
+class OpenCVBackend(DetectorBackend):
+    """Darknet weights through cv2.dnn on the CPU (the original setup)."""
+
+    name = "opencv"
+
+    def __init__(self, weights=None, cfg=None, size=416, threads=None):
+        super().__init__(size, threads)
+        default_weights, default_cfg = MODEL_FILES["opencv"]
+        self.net = cv2.dnn.readNet(weights or default_weights, cfg or default_cfg)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        if threads:
+            cv2.setNumThreads(threads)
+
+        self.model = cv2.dnn_DetectionModel(self.net)
+        self.model.setInputParams(size=(size, size), scale=1/255, swapRB=True)
+        self.output_names = self.net.getUnconnectedOutLayersNames()
+
+    def detect(self, frame, conf_threshold=0.5, nms_threshold=0.4):
+        return self.model.detect(frame, confThreshold=conf_threshold, nmsThreshold=nms_threshold)
+
+    def detect_batch(self, frames, conf_threshold=0.5, nms_threshold=0.4):
+        """One forward pass for every frame (cv2.dnn.blobFromImages), decoded like DetectionModel."""
+        if len(frames) < 2:
+            return super().detect_batch(frames, conf_threshold, nms_threshold)
+
+        blob = cv2.dnn.blobFromImages(frames, 1/255, (self.size, self.size), swapRB=True, crop=False)
+        self.net.setInput(blob)
+        # Region layers give [batch, rows, 85] per YOLO head: (cx, cy, w, h, objectness, 80 class scores)
+        outputs = [out.reshape(len(frames), -1, out.shape[-1]) for out in self.net.forward(self.output_names)]
+
+        results = []
+        for i, frame in enumerate(frames):
+            rows = np.concatenate([out[i] for out in outputs])
+            frame_h, frame_w = frame.shape[:2]
+            results.append(decode_darknet_outputs(rows, frame_w, frame_h, conf_threshold, nms_threshold))
+        return results
+
+
+def decode_darknet_outputs(rows, frame_w, frame_h, conf_threshold, nms_threshold):
+    """Turns Darknet region rows (normalized centre boxes + class scores) into detect() output.
+
+    Uses DetectionModel's integer pixel arithmetic, so a batched frame gives
+    exactly the boxes detect() gives for it on its own.
+    """
+    confs = rows[:, 5:]
+    class_ids = confs.argmax(axis=1)
+    scores = confs[np.arange(len(class_ids)), class_ids]
+    keep = scores >= conf_threshold
+    if not keep.any():
+        return np.empty(0, np.int32), np.empty(0, np.float32), np.empty((0, 4), np.int32)
+
+    rows, class_ids, scores = rows[keep], class_ids[keep], scores[keep]
+    cx = (rows[:, 0] * frame_w).astype(np.int32)
+    cy = (rows[:, 1] * frame_h).astype(np.int32)
+    w = (rows[:, 2] * frame_w).astype(np.int32)
+    h = (rows[:, 3] * frame_h).astype(np.int32)
+    xywh = np.stack([cx - w // 2, cy - h // 2, w, h], axis=1)
+    return _clip_and_suppress(xywh, class_ids, scores, frame_w, frame_h, conf_threshold, nms_threshold)
+
+
+def decode_onnx_outputs(boxes, confs, frame_w, frame_h, conf_threshold, nms_threshold):
+    """Turns the exported [1, N, 1, 4] corner boxes and [1, N, 80] scores into detect() output."""
+    boxes = boxes.reshape(-1, 4)
+    confs = confs.reshape(boxes.shape[0], -1)
+
+    class_ids = confs.argmax(axis=1)
+    scores = confs[np.arange(len(class_ids)), class_ids]
+    keep = scores >= conf_threshold
+    if not keep.any():
+        return np.empty(0, np.int32), np.empty(0, np.float32), np.empty((0, 4), np.int32)
+
+    boxes, class_ids, scores = boxes[keep], class_ids[keep], scores[keep]
+    xywh = np.empty_like(boxes)
+    xywh[:, 0] = boxes[:, 0] * frame_w
+    xywh[:, 1] = boxes[:, 1] * frame_h
+    xywh[:, 2] = (boxes[:, 2] - boxes[:, 0]) * frame_w
+    xywh[:, 3] = (boxes[:, 3] - boxes[:, 1]) * frame_h
+    xywh = xywh.astype(np.int32)
+    return _clip_and_suppress(xywh, class_ids, scores, frame_w, frame_h, conf_threshold, nms_threshold)
+
+
+def _clip_and_suppress(xywh, class_ids, scores, frame_w, frame_h, conf_threshold, nms_threshold):
+    # Clip to the frame before NMS, like DetectionModel: overlaps (and so the kept boxes) depend on it
+    x = np.clip(xywh[:, 0], 0, frame_w - 1)
+    y = np.clip(xywh[:, 1], 0, frame_h - 1)
+    w = np.maximum(1, np.minimum(xywh[:, 2], frame_w - x))
+    h = np.maximum(1, np.minimum(xywh[:, 3], frame_h - y))
+    xywh = np.stack([x, y, w, h], axis=1).astype(np.int32)
+
+    # Class-aware NMS, same as DetectionModel does for Darknet models
+    indices = cv2.dnn.NMSBoxesBatched(xywh.tolist(), scores.tolist(), class_ids.tolist(),
+                                      conf_threshold, nms_threshold)
+    indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+    return class_ids[indices].astype(np.int32), scores[indices].astype(np.float32), xywh[indices]
+
+
+class OnnxRuntimeBackend(DetectorBackend):
+    """ONNX Runtime on the CPU execution provider.
+
+    Expects the usual pytorch-YOLOv4 style export with two outputs: boxes
+    [1, N, 1, 4] as normalized (x1, y1, x2, y2) and confidences [1, N, 80].
+    Fixed-shape exports only run at the resolution they were exported at.
+    """
+
+    name = "onnxruntime"
+
+    def __init__(self, model_path=None, size=416, threads=None, cache_dir=None):
+        super().__init__(size, threads)
+        import onnxruntime as ort
+
+        model_path = model_path or MODEL_FILES["onnxruntime"]
+        cached = os.path.join(cache_dir, "model.ort") if cache_dir else None
+        self.session = None
+        if cached and os.path.exists(cached):
+            # Graph already optimized for this machine and saved in ORT format: skip the optimizer
+            try:
+                self.session = ort.InferenceSession(cached, self._options(ort, threads, optimize=False),
+                                                    providers=["CPUExecutionProvider"])
+                self.cache_hit = True
+            except Exception as e:
+                print(f"⚠️ Cached model unusable, rebuilding: {e}")
+                os.remove(cached)
+
+        if self.session is None:
+            options = self._options(ort, threads, optimize=True)
+            if cached:
+                options.optimized_model_filepath = cached
+                options.add_session_config_entry("session.save_model_format", "ORT")
+            self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    @staticmethod
+    def _options(ort, threads, optimize):
+        options = ort.SessionOptions()
+        options.graph_optimization_level = (ort.GraphOptimizationLevel.ORT_ENABLE_ALL if optimize
+                                            else ort.GraphOptimizationLevel.ORT_DISABLE_ALL)
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        return options
+
+    def detect(self, frame, conf_threshold=0.5, nms_threshold=0.4):
+        boxes, confs = self.session.run(None, {self.input_name: self.make_blob(frame)})[:2]
+        frame_h, frame_w = frame.shape[:2]
+        return decode_onnx_outputs(boxes, confs, frame_w, frame_h, conf_threshold, nms_threshold)
+
+
+class OpenVINOBackend(DetectorBackend):
+    """OpenVINO CPU plugin; takes the ONNX export or an (INT8) IR .xml file."""
+
+    name = "openvino"
+
+    def __init__(self, model_path=None, size=416, threads=None, cache_dir=None):
+        super().__init__(size, threads)
+        import openvino as ov
+
+        core = ov.Core()
+        if cache_dir:
+            # OpenVINO serializes the compiled network here and reloads it on the next run
+            core.set_property({"CACHE_DIR": cache_dir})
+            self.cache_hit = any(f.endswith(".blob") for f in os.listdir(cache_dir))
+        model = core.read_model(model_path or MODEL_FILES["openvino"])
+        if model.inputs[0].partial_shape.is_dynamic:
+            model.reshape([1, 3, size, size])
+
+        config = {"PERFORMANCE_HINT": "LATENCY"}
+        if threads:
+            config["INFERENCE_NUM_THREADS"] = threads
+        self.compiled = core.compile_model(model, "CPU", config)
+        self.request = self.compiled.create_infer_request()
+
+    def detect(self, frame, conf_threshold=0.5, nms_threshold=0.4):
+        outputs = self.request.infer({0: self.make_blob(frame)})
+        boxes, confs = (outputs[out] for out in self.compiled.outputs[:2])
+        frame_h, frame_w = frame.shape[:2]
+        return decode_onnx_outputs(boxes, confs, frame_w, frame_h, conf_threshold, nms_threshold)
+
+
+BACKENDS = {
+    "opencv": OpenCVBackend,
+    "onnxruntime": OnnxRuntimeBackend,
+    "openvino": OpenVINOBackend,
+}
+
+
+def opencv_files(model_path=None):
+    """(weights, cfg) for the OpenCV backend; a custom .weights file uses the .cfg next to it if there is one."""
+    default_weights, default_cfg = MODEL_FILES["opencv"]
+    if model_path is None:
+        return default_weights, default_cfg
+    cfg = os.path.splitext(model_path)[0] + ".cfg"
+    return model_path, cfg if os.path.exists(cfg) else default_cfg
+
+
+def source_files(name, model_path=None, int8=False):
+    """Files a backend is built from (what the model cache key hashes)."""
+    if name == "opencv":
+        return list(opencv_files(model_path))
+    path = model_path or MODEL_FILES[f"{name}-int8" if int8 else name]
+    if path.endswith(".xml"):
+        return [path, os.path.splitext(path)[0] + ".bin"]
+    return [path]
+
+
+def _runtime_version(name):
+    if name == "opencv":
+        return cv2.__version__
+    try:
+        from importlib.metadata import version
+        return version(name)
+    except Exception:
+        return "unknown"
+
+
+class ModelCacheEntry:
+    """One cache directory: backend-specific serialized model files plus manifest.json.
+
+    The manifest holds the class names and the last warm-up timings, so a
+    cached start doesn't read coco.names either.
+    """
+
+    def __init__(self, directory, key, info):
+        self.directory = directory
+        self.key = key
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        try:
+            with open(self.manifest_path, "r") as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError):
+            self.manifest = dict(info, key=key, created=time.time())
+
+    def update(self, **fields):
+        self.manifest.update(fields)
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"  # Batch workers may share an entry
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(self.manifest, f, indent=2)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError as e:
+            print(f"⚠️ Model cache not written: {e}")
+
+
+def model_cache_entry(name, size, model_path=None, int8=False, cache_dir=MODEL_CACHE_DIR):
+    """Cache entry keyed by the model files, backend, input size and runtime version.
+
+    Converted models (ONNX Runtime, OpenVINO) hash the file contents. The
+    OpenCV entry only holds class names and warm-up timings, so hashing
+    ~23 MB of weights on every start would cost more than it saves; it is
+    keyed on each file's path, size and mtime instead.
+    """
+    files = source_files(name, model_path, int8)
+    digest = hashlib.sha1(f"{name}|{size}|{int8}|{_runtime_version(name)}".encode("utf-8"))
+    for path in files:
+        if name == "opencv":
+            stat = os.stat(path)
+            digest.update(f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}".encode("utf-8"))
+            continue
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    key = digest.hexdigest()[:16]
+
+    directory = os.path.join(cache_dir, f"{name}-{size}-{key}")
+    os.makedirs(directory, exist_ok=True)
+    return ModelCacheEntry(directory, key, {"backend": name, "size": size, "int8": int8, "sources": files})
+
+
+def create_backend(name="opencv", size=416, threads=None, model_path=None, int8=False, cache_dir=None):
+    """Builds a detector backend; int8 picks the quantized model file unless model_path is given.
+
+    With cache_dir, the backend's serialized form (ORT-format model, OpenVINO
+    compiled blob) and the class names are cached under a key derived from
+    the model files, so unchanged models skip conversion on the next start.
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}', choose from {sorted(BACKENDS)}")
+    if name == "opencv" and int8:
+        raise ValueError("The OpenCV backend runs the Darknet weights; use onnxruntime or openvino for INT8")
+
+    cache = None
+    if cache_dir:
+        try:
+            cache = model_cache_entry(name, size, model_path, int8, cache_dir)
+        except OSError as e:
+            print(f"⚠️ Model cache disabled: {e}")
+
+    if name == "opencv":
+        # cv2.dnn can't serialize a loaded net, so only the class names and warm-up info are cached
+        weights, cfg = opencv_files(model_path)
+        backend = OpenCVBackend(weights=weights, cfg=cfg, size=size, threads=threads)
+    else:
+        if model_path is None:
+            model_path = MODEL_FILES[f"{name}-int8" if int8 else name]
+        backend = BACKENDS[name](model_path=model_path, size=size, threads=threads,
+                                 cache_dir=cache.directory if cache else None)
+    backend.cache = cache
+    return backend
+
+
+def quantize_onnx(src=MODEL_FILES["onnxruntime"], dst=MODEL_FILES["onnxruntime-int8"]):
+    """Writes a dynamically quantized INT8 copy of the ONNX export (no calibration data needed)."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(src, dst, weight_type=QuantType.QUInt8)
+    print(f"✅ INT8 model written to {dst}")
+    return dst
+
+
+# --------------------------------
+# Accuracy vs Latency Comparison
+# --------------------------------
+def _iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    ih = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = iw * ih
+    union = aw * ah + bw * bh - inter
+    return inter / union if union else 0.0
+
+
+def _agreement(reference, candidate):
+    """Fraction of reference boxes matched (same class, IoU >= 0.5) by the candidate."""
+    ref_ids, _, ref_boxes = reference
+    cand_ids, _, cand_boxes = candidate
+    if len(ref_ids) == 0:
+        return 1.0 if len(cand_ids) == 0 else 0.0
+
+    matched = 0
+    for rid, rbox in zip(ref_ids, ref_boxes):
+        if any(cid == rid and _iou(rbox, cbox) >= 0.5 for cid, cbox in zip(cand_ids, cand_boxes)):
+            matched += 1
+    return matched / len(ref_ids)
+
+
+def compare_backends(video_path, configs, max_frames=200):
+    """Runs every (backend, size, int8) config over the same frames and scores it against OpenCV @ 416."""
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        raise RuntimeError(f"Could not read any frames from {video_path}")
+
+    reference_backend = OpenCVBackend(size=416)
+    reference = [reference_backend.detect(f) for f in frames]
+
+    rows = []
+    for name, size, int8, threads in configs:
+        label = f"{name}{'-int8' if int8 else ''}@{size}"
+        try:
+            backend = create_backend(name, size=size, threads=threads, int8=int8)
+        except Exception as e:
+            print(f"⏭️ Skipping {label}: {e}")
+            continue
+
+        backend.detect(frames[0])  # Warm-up
+        latencies, agreements = [], []
+        for frame, ref in zip(frames, reference):
+            start = time.perf_counter()
+            result = backend.detect(frame)
+            latencies.append((time.perf_counter() - start) * 1000)
+            agreements.append(_agreement(ref, result))
+
+        rows.append({
+            "backend": label,
+            "threads": threads or "auto",
+            "mean_ms": float(np.mean(latencies)),
+            "p95_ms": float(np.percentile(latencies, 95)),
+            "agreement": float(np.mean(agreements)),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare YOLO backends on a recorded clip")
+    parser.add_argument("video", help="Recorded study clip to run the detectors on")
+    parser.add_argument("--backends", nargs="+", default=sorted(BACKENDS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(INPUT_SIZES))
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--int8", action="store_true", help="Also try the INT8 models")
+    parser.add_argument("--frames", type=int, default=200)
+    args = parser.parse_args()
+
+    configs = []
+    for name in args.backends:
+        for size in args.sizes:
+            configs.append((name, size, False, args.threads))
+            if args.int8 and name != "opencv":
+                configs.append((name, size, True, args.threads))
+
+    rows = compare_backends(args.video, configs, args.frames)
+    print(f"{'backend':<24}{'threads':>8}{'mean ms':>10}{'p95 ms':>10}{'agree':>8}")
+    for row in sorted(rows, key=lambda r: r["mean_ms"]):
+        print(f"{row['backend']:<24}{row['threads']!s:>8}{row['mean_ms']:>10.1f}"
+              f"{row['p95_ms']:>10.1f}{row['agreement']:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
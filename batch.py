@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+import numpy as np
+
+from analytics import TimelineArchive, compute_report, format_report
+from benchmark import git_commit
+from timeline import STATUS_CODES, STATUS_NAMES, FocusTimelineRecorder
+from vision import StudyDetector
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mkv", ".mov", ".webm")
+FOCUS = STATUS_CODES["focus"]
+
+# One detector per worker process, loaded once and reused for every video it gets
+_detector = None
+
+
+def find_videos(paths):
+    """Expands directories (recursively) into the video files inside them."""
+    videos = []
+    for path in paths:
+        if os.path.isdir(path):
+            for folder, _, files in sorted(os.walk(path)):
+                videos.extend(os.path.join(folder, name) for name in sorted(files)
+                              if name.lower().endswith(VIDEO_EXTENSIONS))
+        else:
+            videos.append(path)
+    return videos
+
+
+def summarize_runs(runs):
+    """Per-video focus summary straight from its run-length timeline."""
+    if len(runs) == 0:
+        return {"focus_ratio": None, "seconds_by_status": {}, "distractions": 0}
+
+    status = runs["status"]
+    seconds = np.bincount(status, weights=runs["duration"].astype(np.float64), minlength=len(STATUS_NAMES))
+    total = seconds.sum()
+    # A distraction starts wherever a non-focus run follows focus (or opens the video)
+    prev_focus = np.concatenate([[True], status[:-1] == FOCUS])
+    episodes = int(np.count_nonzero((status != FOCUS) & prev_focus))
+    return {
+        "focus_ratio": float(seconds[FOCUS] / total) if total else None,
+        "seconds_by_status": {STATUS_NAMES[code]: round(float(s), 1) for code, s in enumerate(seconds) if s},
+        "distractions": episodes,
+    }
+
+
+# --------------------------------
+# Worker Processes
+# --------------------------------
+def _init_worker(detector_options):
+    global _detector
+    if not detector_options.get("threads"):
+        cv2.setNumThreads(1)  # Parallelism comes from the pool; don't oversubscribe the cores
+    _detector = StudyDetector(source=None, **detector_options)
+
+
+def process_video(path, session_id, stride=1, max_frames=None):
+    """Runs one video through the worker's detector; returns (summary, timeline) for the parent to save."""
+    detector = _detector
+    detector.reset()
+    recorder = FocusTimelineRecorder()
+    recorder.start(task=os.path.basename(path), session_id=session_id, started=os.path.getmtime(path))
+
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        return {"video": path, "id": session_id, "error": "could not open"}, None
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    wall_start = time.perf_counter()
+    decoded = analysed = 0
+    while max_frames is None or analysed < max_frames:
+        # grab() skips the colour conversion of frames we won't analyse
+        if not cap.grab():
+            break
+        index = decoded
+        decoded += 1
+        if index % stride:
+            continue
+        ret, frame = cap.retrieve()
+        if not ret:
+            break
+
+        # Video time, not wall time, so debouncing behaves as if played live
+        result = detector.analyze(frame, index / fps)
+        recorder.record_result(result)
+        analysed += 1
+    cap.release()
+    wall = time.perf_counter() - wall_start
+
+    finished = recorder.finish()
+    summary = {
+        "video": path,
+        "id": session_id,
+        "video_seconds": round(decoded / fps, 1),
+        "frames_decoded": decoded,
+        "frames_analysed": analysed,
+        "wall_s": round(wall, 2),
+        "analysed_fps": round(analysed / wall, 1) if wall else 0.0,
+        "speedup": round(decoded / fps / wall, 1) if wall else 0.0,  # Video seconds per wall second
+    }
+    summary.update(summarize_runs(finished[1] if finished else np.zeros(0)))
+    return summary, finished
+
+
+# --------------------------------
+# Parent Process
+# --------------------------------
+def run_batch(videos, out_dir, detector_options, workers=None, stride=1, max_frames=None):
+    recorder = FocusTimelineRecorder(out_dir)
+    summaries = []
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker,
+                             initargs=(detector_options,)) as pool:
+        futures = {}
+        for i, path in enumerate(videos):
+            session_id = f"{i:04d}-{os.path.splitext(os.path.basename(path))[0]}"
+            futures[pool.submit(process_video, path, session_id, stride, max_frames)] = path
+
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                summary, finished = future.result()
+            except Exception as e:
+                summary, finished = {"video": futures[future], "error": str(e)}, None
+            if finished is not None:
+                recorder.save(*finished)  # Only the parent writes, so index.jsonl never interleaves
+            summaries.append(summary)
+
+            if "error" in summary:
+                print(f"❌ [{done}/{len(videos)}] {summary['video']}: {summary['error']}")
+            else:
+                ratio = summary["focus_ratio"]
+                print(f"✅ [{done}/{len(videos)}] {summary['video']}: {summary['frames_analysed']} frames, "
+                      f"{summary['speedup']}x realtime, focus {'-' if ratio is None else f'{ratio:.0%}'}")
+
+    summaries.sort(key=lambda s: s.get("id", ""))
+    return summaries, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse recorded study videos headlessly on every core")
+    parser.add_argument("videos", nargs="+", help="Video files or folders of videos")
+    parser.add_argument("--out", default=None, help="Output folder (default: batch_output/<timestamp>)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per core)")
+    parser.add_argument("--stride", type=int, default=1, help="Analyse every Nth frame")
+    parser.add_argument("--frames", type=int, default=None, help="Stop each video after this many analysed frames")
+    parser.add_argument("--backend", default="opencv")
+    parser.add_argument("--size", type=int, default=416)
+    parser.add_argument("--threads", type=int, default=None, help="Threads per worker (default: 1)")
+    parser.add_argument("--int8", action="store_true")
+    parser.add_argument("--adaptive", action="store_true", help="Enable adaptive YOLO scheduling")
+    parser.add_argument("--motion-gate", action="store_true", help="Enable the static-frame gate")
+    parser.add_argument("--tiered", action="store_true", help="Low-res YOLO first, full size only when unsure")
+    parser.add_argument("--low-res-size", type=int, default=224, help="Input size of the cheap tier")
+    args = parser.parse_args()
+
+    videos = find_videos(args.videos)
+    if not videos:
+        parser.error("No videos found")
+    out_dir = args.out or os.path.join("batch_output", time.strftime("%Y%m%d-%H%M%S"))
+    os.makedirs(out_dir, exist_ok=True)
+
+    detector_options = {
+        "backend": args.backend,
+        "input_size": args.size,
+        "threads": args.threads,
+        "int8": args.int8,
+        "adaptive_detection": args.adaptive,
+        "motion_gate": args.motion_gate,
+        "tiered_detection": args.tiered,
+        "low_res_size": args.low_res_size,
+        "warm_up": False,  # Per-video throughput is averaged over whole videos anyway
+    }
+
+    print(f"🎬 {len(videos)} videos -> {out_dir}")
+    summaries, wall = run_batch(videos, out_dir, detector_options, args.workers, max(1, args.stride), args.frames)
+
+    # Same report the dashboard shows, over just this batch
+    archive = TimelineArchive(out_dir)
+    archive.refresh()
+    report = compute_report(archive)
+    print(format_report(report))
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": dict(detector_options, stride=args.stride, workers=args.workers or os.cpu_count()),
+        "wall_s": round(wall, 1),
+        "videos": summaries,
+        "report": report,
+    }
+    path = os.path.join(out_dir, "summary.json")
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Summary written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from vision import StudyDetector
+
+STAGES = ("capture", "gate", "yolo", "face", "eyes", "draw")
+
+
+def peak_memory_mb():
+    """Peak resident memory of this process, or None if the platform can't tell us."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS reports bytes
+        return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+    except ImportError:
+        pass  # Windows: no resource module
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return info.peak_wset / 1e6 if hasattr(info, "peak_wset") else None  # rss would be current, not peak
+    except ImportError:
+        return None
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def summarize(samples_ms):
+    samples = np.asarray(samples_ms, dtype=np.float64)
+    if samples.size == 0:
+        return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {"mean": float(samples.mean()), "p50": float(p50), "p95": float(p95),
+            "p99": float(p99), "max": float(samples.max())}
+
+
+def run_clip(path, detector_options, max_frames=None, draw=True):
+    """Feeds one recorded clip through a fresh StudyDetector, as fast as it will go."""
+    detector = StudyDetector(source=path, **detector_options)
+    if not detector.cap.isOpened():
+        raise RuntimeError(f"Could not open {path}")
+
+    stage_ms = {stage: [] for stage in STAGES}
+    frame_ms = []
+    statuses = {}
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+
+    frames = 0
+    while max_frames is None or frames < max_frames:
+        t0 = time.perf_counter()
+        frame = detector.read_frame()
+        t1 = time.perf_counter()
+        if frame is None:
+            break
+
+        # Clip time, not wall time, so debouncing behaves as if played live
+        result = detector.analyze(frame, detector.frame_time())
+        t2 = time.perf_counter()
+        if draw:
+            detector.draw(frame, result)
+        t3 = time.perf_counter()
+
+        stage_ms["capture"].append((t1 - t0) * 1000)
+        for stage, seconds in detector.stage_times.items():
+            stage_ms[stage].append(seconds * 1000)
+        stage_ms["draw"].append((t3 - t2) * 1000)
+        frame_ms.append((t3 - t0) * 1000)
+
+        statuses[result.status.key] = statuses.get(result.status.key, 0) + 1
+        frames += 1
+
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    detector.cleanup()
+
+    report = {
+        "clip": os.path.basename(path),
+        "frames": frames,
+        "fps": frames / wall if wall else 0.0,
+        "wall_s": wall,
+        "cpu_s": cpu,
+        "cpu_percent": 100 * cpu / wall if wall else 0.0,  # >100% means several cores were busy
+        "frame_ms": summarize(frame_ms),
+        "stages_ms": {stage: summarize(samples) for stage, samples in stage_ms.items()},
+        "statuses": statuses,
+    }
+    if detector.motion_gate is not None:
+        report["motion_skip_ratio"] = detector.motion_gate.skip_ratio
+    if detector.scheduler is not None:
+        report["yolo_frames"] = detector.scheduler.detected_frames
+        report["tracked_frames"] = detector.scheduler.tracked_frames
+    if detector.detection_cascade is not None:
+        report["tiers"] = dict(detector.detection_cascade.stats, low_ratio=detector.detection_cascade.low_ratio)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmark of the vision pipeline on recorded clips")
+    parser.add_argument("clips", nargs="+", help="Video files to replay through StudyDetector")
+    parser.add_argument("--frames", type=int, default=None, help="Stop each clip after this many frames")
+    parser.add_argument("--backend", default="opencv")
+    parser.add_argument("--size", type=int, default=416)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--int8", action="store_true")
+    parser.add_argument("--adaptive", action="store_true", help="Enable adaptive YOLO scheduling")
+    parser.add_argument("--motion-gate", action="store_true", help="Enable the static-frame gate")
+    parser.add_argument("--tiered", action="store_true", help="Low-res YOLO first, full size only when unsure")
+    parser.add_argument("--low-res-size", type=int, default=224, help="Input size of the cheap tier")
+    parser.add_argument("--no-draw", action="store_true", help="Skip the drawing stage")
+    parser.add_argument("--output", "-o", default="bench_output.json")
+    args = parser.parse_args()
+
+    detector_options = {
+        "backend": args.backend,
+        "input_size": args.size,
+        "threads": args.threads,
+        "int8": args.int8,
+        "adaptive_detection": args.adaptive,
+        "motion_gate": args.motion_gate,
+        "tiered_detection": args.tiered,
+        "low_res_size": args.low_res_size,
+    }
+
+    clips = []
+    for path in args.clips:
+        print(f"⏱️ Benchmarking {path} ...")
+        report = run_clip(path, detector_options, args.frames, draw=not args.no_draw)
+        clips.append(report)
+        print(f"   {report['frames']} frames, {report['fps']:.1f} fps, "
+              f"p95 {report['frame_ms']['p95']:.1f} ms, CPU {report['cpu_percent']:.0f}%")
+        for stage in STAGES:
+            s = report["stages_ms"][stage]
+            print(f"   {stage:<8} p50 {s['p50']:7.2f}  p95 {s['p95']:7.2f}  p99 {s['p99']:7.2f} ms")
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"platform": platform.platform(), "python": platform.python_version(),
+                    "cpus": os.cpu_count()},
+        "config": detector_options,
+        "peak_memory_mb": peak_memory_mb(),
+        "clips": clips,
+    }
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,131 +1,106 @@
 import time
-import pyttsx3
-import threading
-import queue
+from perf import perf
+from voice import get_service, WARNING_CATEGORIES
+from storage import StudyStore
+from history import HistoryIndex
+from focus_state import Status
+
+# Detector status -> what the engine reacts to. Tiredness is recorded in the
+# timelines but, as before, isn't warned about or penalized here.
+PROBLEMS = {
+    Status.FOCUS: Status.FOCUS,
+    Status.AWAY: Status.AWAY,
+    Status.TIRED: Status.FOCUS,
+    Status.PHONE: Status.PHONE,
+    Status.MULTIPLE_PEOPLE: Status.MULTIPLE_PEOPLE,
+}
 
 
 class StudyEngine:
 
     def __init__(self):
 
+        # -------------------------
+        # Persistence (snapshot + event log)
+        # -------------------------
+        self.store = StudyStore("user_data.json")
+        saved = self.store.load()
+
         # -------------------------
         # Basic Progress Stats
         # -------------------------
-        self.xp = 0
-        self.level = 1
-        self.history = []
+        self.xp = saved["xp"]
+        self.level = saved["level"]
+        # Indexed history: per-day/per-task totals and streaks kept up to date
+        self.history_index = HistoryIndex(saved["history"])
+        self.history = self.history_index.entries
         self.is_muted = False
 
         # -------------------------
         # Task Management
         # -------------------------
-        self.tasks = [
-            {"text": "Python coding", "done": False},
-            {"text": "General Studies", "done": False},
-        ]
+        self.tasks = saved["tasks"]
 
         self.active_task = "General Studies"
 
         # -------------------------
         # AI Status Tracking
         # -------------------------
-        self.last_status = "focus"
+        self.last_status = Status.FOCUS
 
         # -------------------------
         # Voice System
         # -------------------------
-        self.voice_queue = queue.Queue()
-        self.voice_cooldown = 10
-        self.last_voice_time = 0
-
-        self.start_voice_worker()
+        # One persistent TTS engine with pre-rendered phrases, priorities
+        # and per-category cooldowns (see voice.py)
+        self.voice = get_service()
 
         print("✅ StudyEngine Initialized")
 
-    # --------------------------------
-    # Voice Worker Thread (RESOLVED)
-    # --------------------------------
-    def start_voice_worker(self):
-
-        def worker():
-            print("🔊 Voice Worker Started")
-            while True:
-                msg = self.voice_queue.get()
-                if msg is None:
-                    print("👋 Voice Worker Stopping")
-                    break
-                
-                try:
-                    # Initialize engine for each message to avoid driver issues
-                    engine = pyttsx3.init()
-                    engine.setProperty('rate', 170)
-                    print(f"🎙️ Engine Speaking: {msg}")
-                    engine.say(msg)
-                    engine.runAndWait()
-                    engine.stop()  # CRITICAL: Release the audio driver
-                    del engine  # Ensure cleanup
-                except Exception as e:
-                    print(f"❌ Voice Output Error: {e}")
-                finally:
-                    self.voice_queue.task_done()
-
-        threading.Thread(target=worker).start()
-
     # --------------------------------
     # Trigger Voice Safely (RESOLVED)
     # --------------------------------
-    def trigger_voice(self, message):
+    def trigger_voice(self, message, category="announcement"):
 
         if self.is_muted or not message:
             return
 
-        current_time = time.time()
-
-        if current_time - self.last_voice_time > self.voice_cooldown:
-            print(f"🔊 Speaking: {message}")
-            print(f"⬇️ Adding to Voice Queue: {message}")
-            self.voice_queue.put(message)
-            self.last_voice_time = current_time
+        if self.voice.say(message, category):
+            print(f"⬇️ Adding to Voice Queue [{category}]: {message}")
 
     # --------------------------------
     # AI Status Logic
     # --------------------------------
     def handle_status(self, raw_status, message_func):
 
-        status = str(raw_status).lower().strip()
+        with perf.timer("engine.handle_status"):
+            self._handle_status(raw_status, message_func)
+
+    def _handle_status(self, raw_status, message_func):
 
         # -------------------------
-        # Map detector output
+        # Map detector output (a focus_state.Status; table lookup, no string parsing)
         # -------------------------
-        if "phone" in status or "cell" in status:
-            problem = "phone"
-
-        elif "multiple" in status or status.count("person") > 1:
-            problem = "multiple_people"
-
-        elif "away" in status or "no person" in status:
-            problem = "away"
-
-        elif "distract" in status or "looking away" in status:
-            problem = "away"
-
-        else:
-            problem = "focus"
+        problem = PROBLEMS[raw_status]
 
         # -------------------------
         # React only if status changed
         # -------------------------
         if problem != self.last_status:
 
-            if problem != "focus":
+            # Warnings about any other status are obsolete now (phone -> away drops the phone one)
+            self.voice.cancel([category for category in WARNING_CATEGORIES if category != problem.key])
+
+            if problem != Status.FOCUS:
 
-                msg = message_func("asian_mom", problem)
+                msg = message_func("asian_mom", problem.key)
 
                 print(f"📢 WARNING: {problem} -> {msg}")
 
-                self.trigger_voice(msg)
+                self.trigger_voice(msg, problem.key)
 
                 self.xp = max(0, self.xp - 5)
+                self.store.record_xp(self.xp, self.level)
 
             else:
 
@@ -136,9 +111,10 @@ class StudyEngine:
         # -------------------------
         # Reward focus
         # -------------------------
-        if problem == "focus":
+        if problem == Status.FOCUS:
 
             self.xp += 1
+            self.store.record_xp(self.xp, self.level)
 
     # --------------------------------
     # Task Functions
@@ -147,11 +123,13 @@ class StudyEngine:
 
         if task_text:
             self.tasks.append({"text": task_text, "done": False})
+            self.store.append("task_add", text=task_text)
 
     def toggle_task(self, index):
 
         if 0 <= index < len(self.tasks):
             self.tasks[index]["done"] = not self.tasks[index]["done"]
+            self.store.append("task_toggle", index=index, done=self.tasks[index]["done"])
 
     # --------------------------------
     # Log Completed Session
@@ -159,26 +137,30 @@ class StudyEngine:
     def log_session(self, mins, xp):
 
         session_data = {
-            "date": time.strftime("%Y-%m-%d"),
+            "date": time.strftime("%Y-%m-%d %H:%M"),
             "task": self.active_task,
+            "duration": mins,
             "xp": xp,
         }
 
-        self.history.append(session_data)
+        self.history_index.add(session_data)
+        self.store.append("session", entry=session_data)
 
         self.xp += xp
+        self.store.record_xp(self.xp, self.level)
 
     # --------------------------------
     # Save Data
     # --------------------------------
     def save_data(self):
-
+        """Asks the store's writer to fsync now; never waits on disk."""
+        self.store.flush()
         print(f"💾 Data Saved. Current XP: {self.xp}")
 
     def shutdown(self):
-        """Clean shutdown of the voice system"""
-        self.voice_queue.put(None)  # Signal the worker to stop
-        time.sleep(1)  # Give it time to process
+        """Clean shutdown of the voice system and the store (final compaction)"""
+        self.voice.shutdown()
+        self.store.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,127 @@
+import time
+from enum import IntEnum
+
+
+class Status(IntEnum):
+    """Debounced study status. The values are the on-disk timeline codes (see timeline.py)."""
+
+    FOCUS = 0
+    AWAY = 1
+    TIRED = 2
+    PHONE = 3
+    MULTIPLE_PEOPLE = 4
+
+    @property
+    def key(self):
+        """Lower-case name used for messages, voice categories and JSON ("multiple_people")."""
+        return _KEYS[self]
+
+    def __str__(self):
+        return _KEYS[self]
+
+    def __format__(self, spec):
+        return format(_KEYS[self], spec)
+
+
+_KEYS = {status: status.name.lower() for status in Status}
+
+
+# Seconds an observation must hold before a state turns on / off.
+# Onset delays debounce flicker from single bad frames; release delays add
+# hysteresis so a warning doesn't toggle while the detector wavers.
+DEFAULT_DELAYS = {
+    "away": (1.0, 0.5),
+    "tired": (1.0, 0.3),            # ~25 frames at 25 fps, the old TIRED_THRESHOLD
+    "phone": (0.5, 1.0),
+    "multiple_people": (1.0, 1.0),
+}
+
+# Highest priority first, same order StudyDetector has always used
+PRIORITY = (Status.AWAY, Status.TIRED, Status.PHONE, Status.MULTIPLE_PEOPLE)
+
+
+class Debounced:
+    """A boolean condition with time-based on/off delays."""
+
+    __slots__ = ("on_delay", "off_delay", "active", "true_since", "false_since")
+
+    def __init__(self, on_delay, off_delay):
+        self.on_delay = on_delay
+        self.off_delay = off_delay
+        self.active = False
+        self.true_since = None
+        self.false_since = None
+
+    def update(self, observed, now):
+        """observed=None means "can't tell this frame" and leaves the timers alone."""
+        if observed is None:
+            return self.active
+
+        if observed:
+            self.false_since = None
+            if self.true_since is None:
+                self.true_since = now
+            if not self.active and now - self.true_since >= self.on_delay:
+                self.active = True
+        else:
+            self.true_since = None
+            if self.false_since is None:
+                self.false_since = now
+            if self.active and now - self.false_since >= self.off_delay:
+                self.active = False
+        return self.active
+
+    def held_for(self, now):
+        """How long the raw observation has currently been true (0 if it isn't)."""
+        return now - self.true_since if self.true_since is not None else 0.0
+
+    def reset(self):
+        self.active = False
+        self.true_since = None
+        self.false_since = None
+
+
+class FocusStateMachine:
+    """Frame-rate independent status logic shared by the desktop and web modes.
+
+    Feed it the raw per-frame observations with a timestamp; it answers with
+    the debounced Status (AWAY, TIRED, PHONE, MULTIPLE_PEOPLE or FOCUS), so
+    lowering the processing rate changes how often we look, not what counts
+    as tired or away.
+    """
+
+    def __init__(self, delays=None):
+        delays = dict(DEFAULT_DELAYS, **(delays or {}))
+        self.away = Debounced(*delays["away"])
+        self.tired = Debounced(*delays["tired"])
+        self.phone = Debounced(*delays["phone"])
+        self.multiple_people = Debounced(*delays["multiple_people"])
+        # (status, condition) pairs in PRIORITY order; attribute names are the status keys
+        self.conditions = tuple((status, getattr(self, status.key)) for status in PRIORITY)
+        self.status = Status.FOCUS
+
+    def update(self, person_count, phone_seen, eyes_closed, now=None):
+        """eyes_closed is None when no face was found (neither open nor closed)."""
+        if now is None:
+            now = time.monotonic()
+
+        self.away.update(person_count == 0, now)
+        self.tired.update(eyes_closed, now)
+        self.phone.update(phone_seen, now)
+        self.multiple_people.update(person_count > 1, now)
+
+        for status, condition in self.conditions:
+            if condition.active:
+                self.status = status
+                break
+        else:
+            self.status = Status.FOCUS
+        return self.status
+
+    def eyes_closed_for(self, now=None):
+        return self.tired.held_for(time.monotonic() if now is None else now)
+
+    def reset(self):
+        for _, condition in self.conditions:
+            condition.reset()
+        self.status = Status.FOCUS
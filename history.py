@@ -0,0 +1,95 @@
+import datetime
+
+
+def _empty_totals():
+    return {"sessions": 0, "minutes": 0, "xp": 0}
+
+
+class HistoryIndex:
+    """Date/task indexes and running aggregates over StudyEngine.history.
+
+    Built once at startup and updated with add() as sessions are logged, so
+    the History and Dashboard views read precomputed numbers instead of
+    rescanning every session on each navigation.
+    """
+
+    def __init__(self, entries=()):
+        self.entries = []
+        self.by_date = {}   # "YYYY-MM-DD" -> [entry index, ...]
+        self.by_task = {}   # task -> [entry index, ...]
+        self.per_day = {}   # "YYYY-MM-DD" -> totals
+        self.per_task = {}  # task -> totals
+        self.totals = _empty_totals()
+
+        # Streaks over consecutive study days
+        self.last_day = None
+        self.current_streak = 0
+        self.best_streak = 0
+
+        for entry in entries:
+            self.add(entry)
+
+    def add(self, entry):
+        index = len(self.entries)
+        self.entries.append(entry)
+
+        day = entry["date"][:10]
+        task = entry.get("task", "")
+        minutes = entry.get("duration", 0)
+        xp = entry.get("xp", 0)
+
+        self.by_date.setdefault(day, []).append(index)
+        self.by_task.setdefault(task, []).append(index)
+        for totals in (self.per_day.setdefault(day, _empty_totals()),
+                       self.per_task.setdefault(task, _empty_totals()),
+                       self.totals):
+            totals["sessions"] += 1
+            totals["minutes"] += minutes
+            totals["xp"] += xp
+
+        self._update_streak(day)
+
+    def _update_streak(self, day):
+        if day == self.last_day:
+            return
+        try:
+            day_date = datetime.date.fromisoformat(day)
+        except ValueError:
+            return  # Hand-edited / malformed date: counted in totals, not in streaks
+        if self.last_day is not None and day_date < datetime.date.fromisoformat(self.last_day):
+            return  # Out-of-order entry (clock change); streaks only move forward
+
+        if self.last_day is not None and (day_date - datetime.date.fromisoformat(self.last_day)).days == 1:
+            self.current_streak += 1
+        else:
+            self.current_streak = 1
+        self.best_streak = max(self.best_streak, self.current_streak)
+        self.last_day = day
+
+    def streak(self, today=None):
+        """Current streak as of today: it survives until a full day is missed."""
+        if self.last_day is None:
+            return 0
+        today = today or datetime.date.today()
+        gap = (today - datetime.date.fromisoformat(self.last_day)).days
+        return self.current_streak if gap <= 1 else 0
+
+    def today(self, today=None):
+        day = (today or datetime.date.today()).isoformat()
+        return self.per_day.get(day, _empty_totals())
+
+    def count(self, task=None):
+        if task is None:
+            return len(self.entries)
+        return len(self.by_task.get(task, ()))
+
+    def page(self, number, size, task=None):
+        """Entries for one page, newest first; only these get turned into widgets."""
+        start = number * size
+        if task is None:
+            total = len(self.entries)
+            return [self.entries[i] for i in range(total - 1 - start, max(total - 1 - start - size, -1), -1)]
+
+        indices = self.by_task.get(task, [])
+        total = len(indices)
+        return [self.entries[indices[i]] for i in range(total - 1 - start, max(total - 1 - start - size, -1), -1)]
@@ -1,18 +1,46 @@
 import customtkinter as ctk
-import cv2
 import os
+import time
 from vision import StudyDetector
-from ui_manager import StudyUI
+from pipeline import VisionPipeline
+from ui_manager import StudyUI, VIDEO_SIZE
 from engine import StudyEngine
 from modes import get_message
+from perf import perf
+from partner_video import PartnerVideo
+from timeline import FocusTimelineRecorder
+from analytics import TimelineArchive, compute_report
+from startup import StartupLoader
+
+# Components the camera view can't work without; the voice may still be warming up
+VISION_COMPONENTS = ("camera", "model", "cascades")
 
 class StudyGuardianController:
     def __init__(self):
+        t0 = time.perf_counter()
         self.root = ctk.CTk()
         self.root.title("Study Guardian Pro")
         
+        # Saved progress is small and the dashboard needs it, so it loads right here
         self.engine = StudyEngine()
-        self.detector = StudyDetector()
+        engine_seconds = time.perf_counter() - t0
+
+        # Camera, YOLO and cascades load in the background (see check_startup)
+        self.detector = StudyDetector(adaptive_detection=True, motion_gate=True, load=False)
+        self.recorder = FocusTimelineRecorder()
+        self.analytics = TimelineArchive(self.recorder.directory)
+        self.report = None
+        self.pipeline = VisionPipeline(self.detector, on_result=self.recorder.record_result)
+        self.vision_ready = False
+        self.vision_failed = []  # Vision components that failed to load
+        self.startup = StartupLoader({
+            "camera": self.detector.open_camera,
+            "model": self.detector.load_model,
+            "cascades": self.detector.load_cascades,
+            "voice": self.engine.voice.wait_ready,
+        })
+        self.startup.start()
+        self.startup.record("engine", engine_seconds)
         
         self.running = False
         self.timer_seconds = 0
@@ -20,26 +48,59 @@ class StudyGuardianController:
         self.current_session_xp = 0
         
         self.partner_video_path = "static/partner.mp4"
-        self.partner_cap = None
+        self.partner_video = None
+        if os.path.exists(self.partner_video_path):
+            # Decoded once into a frame cache in the background
+            self.partner_video = PartnerVideo(self.partner_video_path, VIDEO_SIZE)
+        self.last_overlay_update = 0
         
         self.ui = StudyUI(self.root, self)
+        self.ui.set_loading(self.startup.pending())
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.startup.record("window", time.perf_counter() - t0)
         
+        self.check_startup()
         self.update_loop()
 
+    def check_startup(self):
+        """Polls the background loaders; starts the camera pipeline as soon as vision is ready."""
+        if not self.vision_ready and not self.vision_failed:
+            if self.startup.done(VISION_COMPONENTS):
+                self.vision_failed = [name for name in VISION_COMPONENTS if name in self.startup.errors]
+                if self.vision_failed:
+                    # Without a model the pipeline would only log an error per frame; keep the session locked
+                    self.ui.set_failed(self.vision_failed)
+                else:
+                    self.vision_ready = True
+                    self.pipeline.start()
+                    self.ui.set_ready()
+            else:
+                self.ui.set_loading(self.startup.pending())
+
+        if self.startup.done():
+            print(self.startup.summary())
+        else:
+            self.root.after(100, self.check_startup)
+
+    def focus_report(self):
+        """Analytics report, recomputed only when new timelines were saved."""
+        if self.analytics.refresh() or self.report is None:
+            self.report = compute_report(self.analytics)
+        return self.report
+
     def start_session(self, duration_mins, xp_reward):
         """Immediately starts everything when a time button is clicked"""
         self.running = True
         self.timer_seconds = duration_mins * 60
         self.current_session_mins = duration_mins
         self.current_session_xp = xp_reward
+        self.recorder.start(self.engine.active_task)
         
-        if os.path.exists(self.partner_video_path):
-            self.partner_cap = cv2.VideoCapture(self.partner_video_path)
+        if self.partner_video:
+            self.partner_video.restart()
         
-        # Voice and cooldown reset
+        # Announcements have their own voice category, so they never block the first warning
         self.engine.trigger_voice(f"Starting {duration_mins} minute session. Let's focus!")
-        self.engine.last_voice_time = 0  # CRITICAL: Reset cooldown so first warning always fires
         
         self.run_countdown()
 
@@ -54,33 +115,39 @@ class StudyGuardianController:
             self.complete_session()  # Changed from stop_session to complete_session
 
     def update_loop(self):
-        # 1. Get AI status from camera
-        frame, status = self.detector.get_user_status()
+        # 1. Pick up the freshest rendered frame and latest inference result (never blocks)
+        frame, status = self.pipeline.latest()
         
         # 2. If session is active, let the engine process warnings
         if self.running:
-            self.engine.handle_status(status, get_message)
+            if status is not None:
+                self.engine.handle_status(status, get_message)
             
-            # Update Partner Video
-            if self.partner_cap and self.partner_cap.isOpened():
-                ret, p_frame = self.partner_cap.read()
-                if not ret: 
-                    self.partner_cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                    ret, p_frame = self.partner_cap.read()
-                if ret:
+            # Update Partner Video (paced by its own fps, repaint skipped between frames)
+            if self.partner_video:
+                p_frame = self.partner_video.frame_at()
+                if p_frame is not None:
                     self.ui.update_frame(self.ui.partner_label, p_frame)
 
         # 3. Always show your own camera feed
         if frame is not None:
             self.ui.update_frame(self.ui.cam_label, frame)
+            perf.tick("ui.frame")
+
+        # 4. Performance overlay + periodic log dump (no-ops unless GUARDIAN_PERF=1)
+        if perf.enabled:
+            now = time.time()
+            if now - self.last_overlay_update > 0.5:
+                self.ui.update_perf_overlay()
+                self.last_overlay_update = now
+            perf.maybe_dump()
         
         self.root.after(30, self.update_loop)
 
     def stop_session(self):
         """Stop session early (user clicked stop)"""
         self.running = False
-        if self.partner_cap: 
-            self.partner_cap.release()
+        self.recorder.stop()
         self.engine.trigger_voice("Session ended early. Try again next time!")
         self.ui.show_dashboard()
 
@@ -88,8 +155,7 @@ class StudyGuardianController:
         """Timer hit 00:00 successfully - award XP"""
         if self.running:
             self.running = False
-            if self.partner_cap:
-                self.partner_cap.release()
+            self.recorder.stop()
             
             # Log the completed session to get XP
             self.engine.log_session(self.current_session_mins, self.current_session_xp)
@@ -98,10 +164,11 @@ class StudyGuardianController:
 
     def on_close(self):
         self.running = False
+        self.recorder.stop()
         self.engine.save_data()
+        self.pipeline.stop()
+        perf.maybe_dump(force=True)
         self.detector.cleanup()
-        if self.partner_cap:
-            self.partner_cap.release()
         self.root.destroy()
         self.engine.shutdown()
 
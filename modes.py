@@ -1,10 +1,28 @@
-def get_message(mode, status):
-    messages = {
-        "asian_mom": {
-            "phone": "PUT THAT PHONE DOWN! You want to be a failure?!",
-            "away": "I don't see you studying! Where did you go?!",
-            "multiple_people": "WHO IS THAT?! Why are you talking?! NO TALKING, ONLY STUDYING!",
-            "focus": "Good. Keep your eyes on the book."
-        }
+MESSAGES = {
+    "asian_mom": {
+        "phone": "PUT THAT PHONE DOWN! You want to be a failure?!",
+        "away": "I don't see you studying! Where did you go?!",
+        "multiple_people": "WHO IS THAT?! Why are you talking?! NO TALKING, ONLY STUDYING!",
+        "focus": "Good. Keep your eyes on the book."
     }
-    return messages[mode].get(status, "Keep working!")
\ No newline at end of file
+}
+
+DEFAULT_MESSAGE = "Keep working!"
+
+# Fixed app announcements (session start lines depend on the duration and are cached on first use)
+ANNOUNCEMENTS = [
+    "Session ended early. Try again next time!",
+    "Congratulations! Session complete. Great job!",
+]
+
+
+def get_message(mode, status):
+    return MESSAGES[mode].get(status, DEFAULT_MESSAGE)
+
+
+def all_messages():
+    """Every fixed phrase the app can speak, for pre-rendering voice audio."""
+    phrases = [DEFAULT_MESSAGE] + ANNOUNCEMENTS
+    for mode_messages in MESSAGES.values():
+        phrases.extend(mode_messages.values())
+    return phrases
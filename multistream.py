@@ -0,0 +1,187 @@
+import argparse
+import json
+import os
+import threading
+import time
+
+import cv2
+
+from pipeline import LatestValue
+from remote import StudentSession
+from vision import StudyDetector
+
+
+class StreamSource:
+    """One camera, RTSP URL or video file, read on its own thread into a LatestValue slot.
+
+    Files stand in for live cameras: they are played back at their own
+    frame rate and looped, so a study hall can be simulated with clips.
+    """
+
+    def __init__(self, name, source, loop=True):
+        self.name = name
+        self.source = source
+        self.is_file = isinstance(source, str) and os.path.isfile(source)
+        self.loop = loop
+
+        self.frames = LatestValue()  # (frame, captured_at)
+        self.alive = True
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._capture, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _capture(self):
+        cap = cv2.VideoCapture(self.source)
+        fps = cap.get(cv2.CAP_PROP_FPS) if self.is_file else 0
+        frame_time = 1.0 / fps if fps and fps > 0 else 0.0
+        next_frame = time.monotonic()
+
+        while not self._stop.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                if self.is_file and self.loop:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    continue
+                print(f"❌ Stream {self.name} ended")
+                break
+
+            if frame_time:
+                next_frame += frame_time
+                wait = next_frame - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                else:
+                    next_frame = time.monotonic()  # Fell behind: don't try to catch up
+            self.frames.put((frame, time.monotonic()))
+
+        self.alive = False
+        cap.release()
+
+
+class MultiStreamServer:
+    """Supervises many students with one YOLO network.
+
+    Every round takes the newest unseen frame from each stream, stacks up
+    to batch_size of them into one blob (DetectorBackend.detect_batch,
+    cv2.dnn.blobFromImages on the OpenCV backend), and hands each result
+    to that stream's StudentSession for the face/eye search and
+    debouncing. Network cost then grows with batches, not with streams.
+    """
+
+    def __init__(self, sources, batch_size=8, **detector_options):
+        self.batch_size = batch_size
+        self.detector = StudyDetector(source=None, **detector_options)
+
+        self.streams = [StreamSource(f"stream{i}", source) for i, source in enumerate(sources)]
+        self.sessions = [StudentSession(self.detector) for _ in self.streams]
+        self.versions = [0] * len(self.streams)
+        self.latest = [None] * len(self.streams)  # Last result dict per stream
+
+        # Counters
+        self.frames = [0] * len(self.streams)
+        self.batches = 0
+        self.yolo_seconds = 0.0
+
+    def start(self):
+        for stream in self.streams:
+            stream.start()
+
+    def stop(self):
+        for stream in self.streams:
+            stream.stop()
+
+    def step(self, wait=0.05):
+        """Analyses one round of fresh frames; returns how many frames it processed."""
+        pending = []  # (stream index, frame, captured_at)
+        for i, stream in enumerate(self.streams):
+            item, version = stream.frames.get(self.versions[i], timeout=0)
+            if item is not None:
+                self.versions[i] = version
+                pending.append((i, *item))
+
+        if not pending:
+            time.sleep(wait)
+            return 0
+
+        for start in range(0, len(pending), self.batch_size):
+            chunk = pending[start:start + self.batch_size]
+            t0 = time.perf_counter()
+            outputs = self.detector.backend.detect_batch([frame for (_, frame, _) in chunk], 0.5, 0.4)
+            self.yolo_seconds += time.perf_counter() - t0
+            self.batches += 1
+
+            for (i, frame, captured_at), raw in zip(chunk, outputs):
+                self.latest[i] = self.sessions[i].analyze(frame, raw, captured_at)
+                self.frames[i] += 1
+        return len(pending)
+
+    def run(self, seconds=None):
+        """Runs until the time is up (or every stream has ended) and returns a throughput report."""
+        self.start()
+        started = time.monotonic()
+        cpu_started = time.process_time()
+        try:
+            while seconds is None or time.monotonic() - started < seconds:
+                if not self.step() and not any(stream.alive for stream in self.streams):
+                    break
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+        return self.report(time.monotonic() - started, time.process_time() - cpu_started)
+
+    def report(self, wall, cpu):
+        total = sum(self.frames)
+        return {
+            "streams": len(self.streams),
+            "batch_size": self.batch_size,
+            "seconds": round(wall, 2),
+            "frames": total,
+            "fps": round(total / wall, 1) if wall else 0.0,
+            "avg_batch": round(total / self.batches, 2) if self.batches else 0.0,
+            "yolo_ms_per_frame": round(1000 * self.yolo_seconds / total, 2) if total else None,
+            "cores_busy": round(cpu / wall, 2) if wall else 0.0,
+            # Capacity measure: frames per CPU-second, i.e. what one fully used core sustains
+            "fps_per_core": round(total / cpu, 1) if cpu else None,
+            "per_stream": [
+                {"source": str(stream.source), "fps": round(count / wall, 1) if wall else 0.0,
+                 "status": result["status"] if result else None}
+                for stream, count, result in zip(self.streams, self.frames, self.latest)
+            ],
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monitor several webcams/clips with one batched YOLO network")
+    parser.add_argument("sources", nargs="+", help="Camera indices, RTSP URLs or video files (files loop)")
+    parser.add_argument("--batch", type=int, default=8, help="Max frames per network forward pass")
+    parser.add_argument("--seconds", type=float, default=30, help="How long to run (0 = until Ctrl+C)")
+    parser.add_argument("--backend", default="opencv")
+    parser.add_argument("--size", type=int, default=416)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="Print the raw report as JSON")
+    args = parser.parse_args()
+
+    sources = [int(s) if s.isdigit() else s for s in args.sources]
+    server = MultiStreamServer(sources, batch_size=args.batch, backend=args.backend,
+                               input_size=args.size, threads=args.threads)
+    report = server.run(args.seconds or None)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"📊 {report['streams']} streams, {report['frames']} frames in {report['seconds']} s "
+          f"({report['fps']} fps, avg batch {report['avg_batch']})")
+    print(f"⚙️ {report['cores_busy']} cores busy -> {report['fps_per_core']} fps per core, "
+          f"YOLO {report['yolo_ms_per_frame']} ms/frame")
+    for stream in report["per_stream"]:
+        print(f"   {stream['source']}: {stream['fps']} fps, {stream['status']}")
+
+
+if __name__ == "__main__":
+    main()
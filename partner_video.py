@@ -0,0 +1,111 @@
+import json
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+class PartnerVideo:
+    """Study-partner clip decoded once into a memory-mapped frame cache.
+
+    The first run decodes the whole clip at display size into
+    ``<cache_dir>/<name>-<w>x<h>-<stamp>.npy`` (plus a small JSON sidecar
+    with the fps); later runs just map that file. Playback picks the frame
+    for the current wall-clock time at the clip's native fps and loops by
+    index, so the UI tick never decodes or seeks. size is the (w, h) the
+    UI paints at, passed in by the controller.
+    """
+
+    def __init__(self, path, size, cache_dir=".cache"):
+        self.path = path
+        self.size = size
+        self.cache_dir = cache_dir
+
+        self.frames = None  # (n, h, w, 3) uint8 memmap once ready
+        self.fps = 30.0
+        self.started_at = time.monotonic()
+        self._last_index = -1
+        self._last_frame = None
+
+        threading.Thread(target=self._load, daemon=True).start()
+
+    @property
+    def ready(self):
+        return self.frames is not None
+
+    def cache_paths(self):
+        stat = os.stat(self.path)
+        stem = os.path.splitext(os.path.basename(self.path))[0]
+        # Size + mtime in the name: editing the clip invalidates the cache
+        key = f"{stem}-{self.size[0]}x{self.size[1]}-{stat.st_size}-{int(stat.st_mtime)}"
+        base = os.path.join(self.cache_dir, key)
+        return base + ".npy", base + ".json"
+
+    def _load(self):
+        try:
+            frames_path, meta_path = self.cache_paths()
+            if not (os.path.exists(frames_path) and os.path.exists(meta_path)):
+                self._decode(frames_path, meta_path)
+
+            with open(meta_path) as f:
+                meta = json.load(f)
+            frames = np.load(frames_path, mmap_mode="r")
+            self.fps = meta["fps"]
+            self.frames = frames[:meta["frames"]]
+            print(f"🎞️ Partner video ready: {meta['frames']} frames @ {self.fps:.0f} fps")
+        except Exception as e:
+            print(f"❌ Partner Video Error: {e}")
+
+    def _decode(self, frames_path, meta_path):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        cap = cv2.VideoCapture(self.path)
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        expected = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if expected <= 0:
+            raise RuntimeError(f"Can't read frame count of {self.path}")
+
+        width, height = self.size
+        tmp_path = frames_path + ".tmp.npy"
+        out = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.uint8,
+                                        shape=(expected, height, width, 3))
+        count = 0
+        while count < expected:
+            ret, frame = cap.read()
+            if not ret:
+                break  # Containers often over-report the frame count
+            cv2.resize(frame, self.size, dst=out[count], interpolation=cv2.INTER_AREA)
+            count += 1
+        cap.release()
+        out.flush()
+        del out
+
+        if count == 0:
+            os.remove(tmp_path)
+            raise RuntimeError(f"No frames decoded from {self.path}")
+
+        os.replace(tmp_path, frames_path)
+        with open(meta_path, "w") as f:
+            json.dump({"fps": fps, "frames": count, "source": self.path}, f)
+
+    def restart(self):
+        self.started_at = time.monotonic()
+        self._last_index = -1
+
+    def frame_at(self, now=None):
+        """Frame for the current time, or None while the cache is still being built.
+
+        Returns the very same object while the index doesn't change, so the
+        renderer can skip repainting between partner-video frames.
+        """
+        if self.frames is None:
+            return None
+        if now is None:
+            now = time.monotonic()
+
+        index = int((now - self.started_at) * self.fps) % len(self.frames)
+        if index != self._last_index:
+            self._last_index = index
+            self._last_frame = self.frames[index]
+        return self._last_frame
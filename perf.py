@@ -0,0 +1,139 @@
+import contextlib
+import json
+import os
+import threading
+import time
+from array import array
+
+
+class RingHistogram:
+    """Fixed-size ring buffer of the most recent samples (seconds)."""
+
+    def __init__(self, size=512):
+        self.size = size
+        self.samples = array("d", [0.0]) * size
+        self.count = 0  # Total ever recorded; the buffer holds the last `size`
+
+    def add(self, value):
+        self.samples[self.count % self.size] = value
+        self.count += 1
+
+    def stats(self):
+        n = min(self.count, self.size)
+        if n == 0:
+            return {"count": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+        values = sorted(self.samples[:n])
+        return {
+            "count": self.count,
+            "mean_ms": 1000 * sum(values) / n,
+            "p50_ms": 1000 * values[n // 2],
+            "p95_ms": 1000 * values[min(n - 1, int(n * 0.95))],
+            "max_ms": 1000 * values[-1],
+        }
+
+
+class _Timer:
+    __slots__ = ("monitor", "name", "start")
+
+    def __init__(self, monitor, name):
+        self.monitor = monitor
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.monitor.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+_NULL_TIMER = contextlib.nullcontext()
+
+
+class PerfMonitor:
+    """Hot-path timers with ring-buffer histograms and periodic log dumps.
+
+    When disabled, timer() hands back a shared no-op context manager and
+    record()/tick() return immediately, so instrumented code pays about one
+    attribute lookup per call.
+    """
+
+    def __init__(self, enabled=False, size=512, log_path="perf.log", dump_interval=30):
+        self.enabled = enabled
+        self.size = size
+        self.log_path = log_path
+        self.dump_interval = dump_interval
+
+        self.histograms = {}
+        self._last_tick = {}
+        self._last_dump = time.time()
+        self._lock = threading.Lock()
+
+    def enable(self, log_path=None):
+        if log_path:
+            self.log_path = log_path
+        self.enabled = True
+        print(f"📈 Performance monitoring ON (logging to {self.log_path})")
+
+    def timer(self, name):
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def record(self, name, seconds):
+        if not self.enabled:
+            return
+        hist = self.histograms.get(name)
+        if hist is None:
+            with self._lock:
+                hist = self.histograms.setdefault(name, RingHistogram(self.size))
+        hist.add(seconds)
+
+    def tick(self, name):
+        """Records the interval since the previous tick of `name` (for frame rates)."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        last = self._last_tick.get(name)
+        self._last_tick[name] = now
+        if last is not None:
+            self.record(name, now - last)
+
+    def fps(self, name):
+        hist = self.histograms.get(name)
+        if hist is None:
+            return 0.0
+        mean_ms = hist.stats()["mean_ms"]
+        return 1000 / mean_ms if mean_ms else 0.0
+
+    def snapshot(self):
+        with self._lock:
+            names = list(self.histograms)
+        return {name: self.histograms[name].stats() for name in names}
+
+    def overlay_text(self):
+        """One-line summary for the on-screen overlay."""
+        stats = self.snapshot()
+        analyze = stats.get("vision.analyze", {}).get("p95_ms", 0.0)
+        paint = stats.get("ui.update_frame", {}).get("p95_ms", 0.0)
+        return (f"UI {self.fps('ui.frame'):.0f} fps | AI {self.fps('vision.result'):.0f} fps | "
+                f"analyze p95 {analyze:.0f} ms | paint p95 {paint:.1f} ms")
+
+    def maybe_dump(self, force=False):
+        """Appends a JSON snapshot to the log file at most every dump_interval seconds."""
+        if not self.enabled:
+            return
+        now = time.time()
+        if not force and now - self._last_dump < self.dump_interval:
+            return
+        self._last_dump = now
+        try:
+            with open(self.log_path, "a") as f:
+                f.write(json.dumps({"time": time.strftime("%Y-%m-%d %H:%M:%S"), "stats": self.snapshot()}) + "\n")
+        except OSError as e:
+            print(f"❌ Perf Log Error: {e}")
+
+
+# Shared monitor; set GUARDIAN_PERF=1 to turn it on at startup
+perf = PerfMonitor(enabled=os.environ.get("GUARDIAN_PERF") == "1")
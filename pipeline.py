@@ -0,0 +1,153 @@
+import threading
+import time
+from perf import perf
+from vision import AnalysisResult
+
+
+class LatestValue:
+    """Bounded (size 1) queue with latest-wins semantics.
+
+    put() overwrites whatever is waiting, so a slow consumer only ever sees
+    the freshest item and stale ones are dropped instead of piling up.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._value = None
+        self._version = 0
+        self._taken_version = 0
+        self.dropped = 0
+
+    def put(self, value):
+        with self._cond:
+            if self._version > self._taken_version:
+                self.dropped += 1
+            self._value = value
+            self._version += 1
+            self._cond.notify_all()
+
+    def get(self, after_version=0, timeout=None):
+        """Waits for an item newer than after_version; returns (value, version) or (None, after_version)."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._version > after_version, timeout):
+                return None, after_version
+            self._taken_version = self._version
+            return self._value, self._version
+
+    def peek(self):
+        with self._cond:
+            return self._value, self._version
+
+
+class VisionPipeline:
+    """Runs StudyDetector as three threaded stages: capture -> infer -> render.
+
+    Each stage hands off through a LatestValue slot, so the camera is never
+    throttled by inference, the renderer always annotates the newest frame
+    with the most recent completed result, and the Tk thread only has to
+    pick up a finished frame via latest().
+    """
+
+    def __init__(self, detector, on_result=None):
+        self.detector = detector
+        self.on_result = on_result  # Called on the infer thread with every completed result
+
+        self.frames = LatestValue()    # capture -> infer / render
+        self.results = LatestValue()   # infer -> render / engine
+        self.rendered = LatestValue()  # render -> UI
+
+        self._stop = threading.Event()
+        self._threads = []
+        self._ui_version = 0
+
+        # Simple rates for debugging ("how far behind is inference?")
+        self.capture_fps = 0.0
+        self.infer_fps = 0.0
+
+    def start(self):
+        for name, target in (("capture", self._capture_loop),
+                             ("infer", self._infer_loop),
+                             ("render", self._render_loop)):
+            t = threading.Thread(target=target, name=f"vision-{name}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        print("🎥 Vision Pipeline Started")
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    # --------------------------------
+    # Stages
+    # --------------------------------
+    def _capture_loop(self):
+        last = time.perf_counter()
+        while not self._stop.is_set():
+            frame = self.detector.read_frame()
+            if frame is None:
+                # Camera hiccup / unplugged: report away like get_user_status() did
+                self.results.put(AnalysisResult.away())
+                time.sleep(0.1)
+                continue
+
+            self.frames.put((frame, self.detector.frame_time()))
+            perf.tick("vision.capture")
+            now = time.perf_counter()
+            self.capture_fps = 0.9 * self.capture_fps + 0.1 / max(now - last, 1e-6)
+            last = now
+
+    def _infer_loop(self):
+        version = 0
+        last = time.perf_counter()
+        while not self._stop.is_set():
+            item, version = self.frames.get(version, timeout=0.2)
+            if item is None:
+                continue
+            frame, captured_at = item
+            try:
+                with perf.timer("vision.analyze"):
+                    result = self.detector.analyze(frame, captured_at)
+            except Exception as e:
+                print(f"❌ Inference Error: {e}")
+                continue
+
+            self.results.put(result)
+            perf.tick("vision.result")
+            if self.on_result is not None:
+                self.on_result(result)
+            now = time.perf_counter()
+            self.infer_fps = 0.9 * self.infer_fps + 0.1 / max(now - last, 1e-6)
+            last = now
+
+    def _render_loop(self):
+        version = 0
+        while not self._stop.is_set():
+            item, version = self.frames.get(version, timeout=0.2)
+            if item is None:
+                continue
+            result, _ = self.results.peek()
+            # The capture stage hands the same array to inference, so annotate a copy
+            frame = item[0].copy()
+            if result is not None:
+                self.detector.draw(frame, result)
+            self.rendered.put((frame, result))
+
+    # --------------------------------
+    # UI side (non-blocking)
+    # --------------------------------
+    def latest(self):
+        """Returns (frame, status) for the Tk loop.
+
+        frame is None when nothing new was rendered since the last call;
+        status is the most recent completed inference (None before the first).
+        """
+        frame = None
+        item, self._ui_version = self.rendered.get(self._ui_version, timeout=0)
+        if item is not None:
+            frame = item[0]
+
+        result, _ = self.results.peek()
+        status = result.status if result is not None else None
+        return frame, status
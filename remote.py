@@ -0,0 +1,228 @@
+import base64
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from focus_state import FocusStateMachine, Status
+from vision import FaceTracker, StudyDetector, observations
+
+MAX_FRAME_WIDTH = 640  # Browsers should already send smaller frames; bigger ones are shrunk
+
+
+def decode_frame(data):
+    """Base64 JPEG/PNG (a data: URL or the bare payload) -> BGR frame, or None if it doesn't decode."""
+    if not isinstance(data, str):
+        return None
+    if "," in data[:64]:
+        data = data.split(",", 1)[1]
+    try:
+        raw = np.frombuffer(base64.b64decode(data), dtype=np.uint8)
+    except ValueError:
+        return None
+    if raw.size == 0:
+        return None  # imdecode raises on an empty buffer
+    try:
+        frame = cv2.imdecode(raw, cv2.IMREAD_COLOR)
+    except cv2.error:
+        return None
+    if frame is not None and frame.shape[1] > MAX_FRAME_WIDTH:
+        h, w = frame.shape[:2]
+        frame = cv2.resize(frame, (MAX_FRAME_WIDTH, h * MAX_FRAME_WIDTH // w), interpolation=cv2.INTER_AREA)
+    return frame
+
+
+class StudentSession:
+    """Per-student state when one detector serves many students (/analyze, multistream.py).
+
+    The YOLO pass happens elsewhere, batched across students; this does the
+    cheap per-student rest of StudyDetector._analyze: face/eye search in
+    this student's own search window and time-based debouncing.
+    """
+
+    def __init__(self, detector):
+        self.detector = detector
+        self.state = FocusStateMachine()
+        self.face_tracker = FaceTracker(detector.face_cascade, detector.eye_cascade)
+        self.status = Status.FOCUS
+        self.last_seen = time.monotonic()
+
+    def analyze(self, frame, raw_detections, now):
+        """Result dict for a frame whose (class_ids, scores, boxes) came from a batched detect."""
+        detections = self.detector.to_detections(*raw_detections)
+        face = self.face_tracker.find(frame, detections.largest_person())
+        eyes = self.face_tracker.find_eyes(frame, face) if face is not None else []
+        return self.update(*observations(detections, face, eyes), now)
+
+    def update(self, person_count, phone_seen, eyes_closed, now):
+        self.status = self.state.update(person_count, phone_seen, eyes_closed, now)
+        return {
+            "status": self.status.key,  # JSON-facing: plain strings
+            "persons": person_count,
+            "phone": phone_seen,
+            "eyes_closed_for": self.state.eyes_closed_for(now),
+            "time": now,
+        }
+
+
+class _Job:
+    """One /analyze request waiting for the batch worker."""
+
+    __slots__ = ("session", "items", "results", "error", "done")
+
+    def __init__(self, session, items):
+        self.session = session
+        self.items = items  # [(now, frame or None, features or None), ...]
+        self.results = None
+        self.error = None
+        self.done = threading.Event()
+
+    @property
+    def frame_count(self):
+        return sum(1 for item in self.items if item[1] is not None)
+
+
+class AnalyzeBatcher:
+    """Micro-batches /analyze requests from many remote students.
+
+    Request threads only decode their frames and enqueue a job. One worker
+    thread takes whatever jobs arrive within max_wait (up to max_frames
+    frames), runs YOLO over all of them with a single detect_batch() call,
+    then does the cheap per-student part (face/eyes search, debouncing)
+    in arrival order. Clients that send precomputed features skip YOLO
+    and the cascades entirely.
+
+    The model and cascades come from a camera-less StudyDetector, so
+    remote students are judged exactly like the desktop app's user. If the
+    model can't load, model_error says why and feature-only requests still
+    work.
+    """
+
+    def __init__(self, max_frames=16, max_wait=0.02, session_ttl=120, **detector_options):
+        self.max_frames = max_frames
+        self.max_wait = max_wait
+        self.session_ttl = session_ttl
+        self.detector = StudyDetector(source=None, load=False, **detector_options)
+        self.detector.load_cascades()
+        self.model_error = None
+        try:
+            self.detector.load_model()
+        except Exception as e:
+            self.model_error = str(e)
+
+        self.sessions = {}  # session id -> StudentSession (worker thread only)
+        self._queue = queue.Queue()
+
+        # Counters
+        self.batches = 0
+        self.batched_frames = 0
+
+        self.thread = threading.Thread(target=self._worker, daemon=True)
+        self.thread.start()
+
+    # --------------------------------
+    # Request threads
+    # --------------------------------
+    def submit(self, session_id, items, timeout=5.0):
+        """Analyses one client's items in order; returns one result dict per item, or None on timeout.
+
+        Raises RuntimeError if this client's items could not be analysed.
+        """
+        job = _Job(session_id, items)
+        self._queue.put(job)
+        if not job.done.wait(timeout):
+            return None
+        if job.error is not None:
+            raise RuntimeError(job.error)
+        return job.results
+
+    @property
+    def average_batch(self):
+        return self.batched_frames / self.batches if self.batches else 0.0
+
+    # --------------------------------
+    # Worker Thread
+    # --------------------------------
+    def _take_jobs(self):
+        jobs = [self._queue.get()]
+        frames = jobs[0].frame_count
+        deadline = time.monotonic() + self.max_wait
+        while frames < self.max_frames:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                job = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            jobs.append(job)
+            frames += job.frame_count
+        return jobs
+
+    def _worker(self):
+        print("🌐 Remote analysis worker started")
+        while True:
+            jobs = self._take_jobs()
+            try:
+                self._run_batch(jobs)
+            except Exception as e:
+                print(f"❌ Remote Analysis Error: {e}")
+                for job in jobs:
+                    if job.results is None and job.error is None:
+                        job.error = str(e)
+            finally:
+                for job in jobs:
+                    job.done.set()
+
+    def _run_batch(self, jobs):
+        detector = self.detector
+        frames = [frame for job in jobs for (_, frame, _) in job.items if frame is not None]
+        outputs, batch_error = [], None
+        if frames and detector.backend is None:
+            batch_error = f"Detector unavailable: {self.model_error}"
+        elif frames:
+            try:
+                outputs = detector.backend.detect_batch(frames, 0.5, 0.4)
+                self.batches += 1
+                self.batched_frames += len(frames)
+            except Exception as e:
+                print(f"❌ Remote Analysis Error (YOLO): {e}")
+                batch_error = str(e)
+
+        wall = time.monotonic()
+        offset = 0
+        for job in jobs:
+            # Each job owns a fixed slice of the outputs, so one failing job can't shift the others
+            count = job.frame_count
+            job_outputs = outputs[offset:offset + count]
+            offset += count
+            if count and batch_error is not None:
+                job.error = batch_error
+                continue
+            try:
+                job.results = self._run_job(job, iter(job_outputs), wall)
+            except Exception as e:
+                print(f"❌ Remote Analysis Error ({job.session}): {e}")
+                job.error = str(e)
+
+        # Forget students who closed the tab
+        for session_id in [s for s, session in self.sessions.items() if wall - session.last_seen > self.session_ttl]:
+            del self.sessions[session_id]
+
+    def _run_job(self, job, outputs, wall):
+        session = self.sessions.get(job.session)
+        if session is None:
+            session = self.sessions[job.session] = StudentSession(self.detector)
+        session.last_seen = wall
+
+        results = []
+        for (now, frame, features) in job.items:
+            if frame is not None:
+                results.append(session.analyze(frame, next(outputs), now))
+            else:
+                person_count = int(features.get("persons", 1 if features.get("face") else 0))
+                results.append(session.update(person_count, bool(features.get("phone", False)),
+                                              features.get("eyes_closed"), now))
+        return results
@@ -0,0 +1,59 @@
+import threading
+import time
+
+from perf import perf
+
+
+class StartupLoader:
+    """Loads heavy resources on background threads, one thread per component.
+
+    components maps a name to a no-argument function. They all start at
+    once, so the slowest one (usually the YOLO weights or the camera)
+    decides the startup time instead of the sum. The Tk thread polls
+    done() from root.after() and never waits; wall time per component
+    ends up in timings (and in the perf log as startup.<name>).
+    """
+
+    def __init__(self, components):
+        self.components = dict(components)
+        self.timings = {}  # name -> seconds
+        self.errors = {}   # name -> exception
+        self._lock = threading.Lock()
+        self._started = None
+
+    def start(self):
+        self._started = time.perf_counter()
+        for name, load in self.components.items():
+            threading.Thread(target=self._run, args=(name, load), name=f"startup-{name}", daemon=True).start()
+
+    def record(self, name, seconds):
+        """Adds a timing for something that had to load on the main thread."""
+        with self._lock:
+            self.timings[name] = seconds
+        perf.record(f"startup.{name}", seconds)
+
+    def _run(self, name, load):
+        t0 = time.perf_counter()
+        try:
+            load()
+        except Exception as e:
+            print(f"❌ Startup Error ({name}): {e}")
+            with self._lock:
+                self.errors[name] = e
+        self.record(name, time.perf_counter() - t0)
+
+    def done(self, names=None):
+        """True once these components (all by default) have finished, successfully or not."""
+        with self._lock:
+            return all(name in self.timings for name in (names or self.components))
+
+    def pending(self):
+        with self._lock:
+            return [name for name in self.components if name not in self.timings]
+
+    def summary(self):
+        with self._lock:
+            parts = [f"{name} {seconds:.2f}s" + (" ❌" if name in self.errors else "")
+                     for name, seconds in sorted(self.timings.items(), key=lambda kv: -kv[1])]
+        total = time.perf_counter() - self._started if self._started else 0.0
+        return f"⏱️ Startup {total:.2f}s: " + ", ".join(parts)
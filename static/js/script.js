@@ -2,31 +2,68 @@ const webcam = document.getElementById('webcam');
 const statusPill = document.getElementById('status-pill');
 let lastAlert = 0;
 
+// Frames are shrunk in the browser and sent a few at a time
+const FRAME_WIDTH = 320;
+const CAPTURE_EVERY_MS = 250;
+const FRAMES_PER_POST = 4;
+const ALERT_COOLDOWN_MS = 10000;
+
+// New id per page load: the server keys debouncing state on it
+const sessionId = (crypto.randomUUID && crypto.randomUUID()) || String(Date.now()) + Math.random();
+const canvas = document.createElement('canvas');
+let pending = [];
+let inFlight = false;
+
 // Start Webcam
 navigator.mediaDevices.getUserMedia({ video: true })
     .then(stream => { webcam.srcObject = stream; });
 
-// Simple Logic: If no motion is detected or you leave the frame
-function checkFocus() {
-    // In a full version, we'd send the image to Python here
-    // For now, let's simulate the connection
-    let currentStatus = "focus"; 
-    
+function captureFrame() {
+    if (!webcam.videoWidth) return;
+
+    canvas.width = FRAME_WIDTH;
+    canvas.height = Math.round(webcam.videoHeight * FRAME_WIDTH / webcam.videoWidth);
+    canvas.getContext('2d').drawImage(webcam, 0, 0, canvas.width, canvas.height);
+    pending.push({t: performance.now(), image: canvas.toDataURL('image/jpeg', 0.7)});
+
+    // Never pile up more than one batch while a request is slow
+    if (pending.length > FRAMES_PER_POST) pending.shift();
+    if (pending.length >= FRAMES_PER_POST && !inFlight) sendFrames();
+}
+
+function sendFrames() {
+    const frames = pending;
+    pending = [];
+    inFlight = true;
+
+    fetch('/analyze', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({session: sessionId, mode: "asian_mom", frames: frames})
+    })
+        .then(response => response.ok ? response.json() : null)
+        .then(result => { if (result) showStatus(result); })
+        .catch(() => {})
+        .finally(() => { inFlight = false; });
+}
+
+function showStatus(result) {
     // Logic to update UI
-    if (currentStatus === "focus") {
+    if (result.status === "focus") {
         statusPill.className = "pill focus";
         statusPill.innerText = "FOCUSING";
-    } else {
-        statusPill.className = "pill warning";
-        statusPill.innerText = currentStatus.toUpperCase();
-        
-        // Tell Python to play the voice
-        fetch('/analyze', {
-            method: 'POST',
-            headers: {'Content-Type': 'application/json'},
-            body: JSON.stringify({status: currentStatus, mode: "asian_mom"})
-        });
+        return;
+    }
+
+    statusPill.className = "pill warning";
+    statusPill.innerText = result.status.replace('_', ' ').toUpperCase();
+
+    // The student's own speakers, not the server's
+    const now = Date.now();
+    if (result.message && now - lastAlert > ALERT_COOLDOWN_MS && window.speechSynthesis) {
+        speechSynthesis.speak(new SpeechSynthesisUtterance(result.message));
+        lastAlert = now;
     }
 }
 
-setInterval(checkFocus, 3000); // Check every 3 seconds
\ No newline at end of file
+setInterval(captureFrame, CAPTURE_EVERY_MS);
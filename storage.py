@@ -0,0 +1,201 @@
+import copy
+import json
+import os
+import queue
+import threading
+import time
+
+DEFAULT_STATE = {
+    "xp": 0,
+    "level": 1,
+    "tasks": [
+        {"text": "Python coding", "done": False},
+        {"text": "General Studies", "done": False},
+    ],
+    "history": [],
+    "seq": 0,  # Last event folded into this snapshot
+}
+
+_FLUSH = object()
+_CLOSE = object()
+
+
+def apply_event(state, event):
+    """Folds one log event into a state dict (used for replay and by the writer)."""
+    kind = event["type"]
+    if kind == "xp":
+        state["xp"] = event["xp"]
+        state["level"] = event["level"]
+    elif kind == "session":
+        state["history"].append(event["entry"])
+    elif kind == "task_add":
+        state["tasks"].append({"text": event["text"], "done": False})
+    elif kind == "task_toggle":
+        if 0 <= event["index"] < len(state["tasks"]):
+            state["tasks"][event["index"]]["done"] = event["done"]
+    state["seq"] = max(state["seq"], event["seq"])
+
+
+class StudyStore:
+    """Snapshot + append-only event log for StudyEngine's progress.
+
+    Every change is appended to ``<name>.log.jsonl`` by a background writer,
+    so callers never wait on disk. The writer fsyncs in batches (at most
+    once per fsync_interval), coalesces the per-frame XP updates into one
+    event per batch, and periodically folds the log into the JSON snapshot
+    (write to temp file, fsync, rename) before truncating it. Events carry
+    a sequence number so a crash mid-compaction can't replay them twice.
+    """
+
+    def __init__(self, path="user_data.json", fsync_interval=1.0, compact_every=500):
+        self.path = path
+        self.log_path = os.path.splitext(path)[0] + ".log.jsonl"
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending_xp = None
+        self._seq = 0
+        self._state = None
+        self._log = None
+        self._log_events = 0
+        self._thread = None
+
+    # --------------------------------
+    # Startup
+    # --------------------------------
+    def load(self):
+        """Reads the snapshot, replays the log tail and starts the writer; returns a state copy."""
+        state = copy.deepcopy(DEFAULT_STATE)
+        try:
+            with open(self.path, "r") as f:
+                state.update(json.load(f))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"❌ Snapshot Load Error: {e}")
+
+        replayed = 0
+        snapshot_seq = state["seq"]  # Compare against the snapshot, not the running seq: the log may be out of order
+        if os.path.exists(self.log_path):
+            good = 0  # Byte offset just past the last complete event
+            with open(self.log_path, "rb") as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("unterminated line")
+                        event = json.loads(line)
+                    except ValueError:
+                        break  # Torn last line from a crash; everything before it is good
+                    good += len(line)
+                    if event["seq"] > snapshot_seq:
+                        apply_event(state, event)
+                        replayed += 1
+            if good < os.path.getsize(self.log_path):
+                # Drop the torn tail, or new events would be appended onto it and lost on the next replay
+                print(f"⚠️ Discarding torn log tail after {good} bytes")
+                os.truncate(self.log_path, good)
+
+        self._state = state
+        self._seq = state["seq"]
+        self._log_events = replayed
+        self._log = open(self.log_path, "a")
+        self._thread = threading.Thread(target=self._writer, daemon=True)
+        self._thread.start()
+
+        print(f"📂 Loaded {len(state['history'])} sessions ({replayed} events replayed)")
+        return copy.deepcopy(state)
+
+    # --------------------------------
+    # Public API (never blocks on disk)
+    # --------------------------------
+    def append(self, event_type, **fields):
+        with self._lock:
+            self._seq += 1
+            # Queued under the lock, so every lower seq is queued before the writer numbers the next XP event
+            self._queue.put(dict(fields, type=event_type, seq=self._seq))
+
+    def record_xp(self, xp, level):
+        """Latest XP/level; written once per batch no matter how often it changes."""
+        with self._lock:
+            self._pending_xp = (xp, level)
+
+    def flush(self):
+        self._queue.put(_FLUSH)
+
+    def close(self, timeout=5.0):
+        if self._thread is None:
+            return
+        self._queue.put(_CLOSE)
+        self._thread.join(timeout)
+        self._thread = None
+
+    # --------------------------------
+    # Writer Thread
+    # --------------------------------
+    def _take_batch(self):
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=self.fsync_interval))
+            while True:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            # Anything appended since the drain has a lower seq than the XP event: take it along
+            try:
+                while True:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            if self._pending_xp is not None:
+                self._seq += 1
+                xp, level = self._pending_xp
+                batch.append({"type": "xp", "xp": xp, "level": level, "seq": self._seq})
+                self._pending_xp = None
+        return batch
+
+    def _writer(self):
+        last_sync = time.monotonic()
+        while True:
+            batch = self._take_batch()
+            closing = _CLOSE in batch
+            force = closing or _FLUSH in batch
+            events = [e for e in batch if e is not _FLUSH and e is not _CLOSE]
+            events.sort(key=lambda e: e["seq"])  # XP may be numbered after queued events
+
+            try:
+                for event in events:
+                    self._log.write(json.dumps(event) + "\n")
+                    apply_event(self._state, event)
+                self._log_events += len(events)
+
+                if events or force:
+                    self._log.flush()
+                    if force or time.monotonic() - last_sync >= self.fsync_interval:
+                        os.fsync(self._log.fileno())
+                        last_sync = time.monotonic()
+
+                if closing or self._log_events >= self.compact_every:
+                    self._compact()
+            except OSError as e:
+                print(f"❌ Save Error: {e}")
+
+            if closing:
+                self._log.close()
+                break
+
+    def _compact(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+        # Snapshot is durable; the log can start over
+        self._log.close()
+        self._log = open(self.log_path, "w")
+        self._log_events = 0
@@ -0,0 +1,65 @@
+import os
+import struct
+
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+
+from backends import MODEL_FILES, OpenCVBackend
+
+CFG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), MODEL_FILES["opencv"][1])
+
+
+def write_random_weights(path):
+    """Darknet weights for the repo's cfg: He-initialized convs and identity batch norms.
+
+    Sane activations give plenty of overlapping boxes, some hanging off the
+    frame edges, which is what makes clipping and NMS differences show up.
+    """
+    with open(path, "wb") as f:
+        f.write(struct.pack("<iiiq", 0, 2, 5, 0))
+    # Layer shapes come from a throwaway net loaded with oversized dummy weights
+    with open(path, "ab") as f:
+        f.write(np.full(8_000_000, 0.01, dtype=np.float32).tobytes())
+    net = cv2.dnn.readNet(path, CFG)
+
+    rng = np.random.default_rng(0)
+    names = net.getLayerNames()
+    parts = []
+    for i, name in enumerate(names):
+        layer = net.getLayer(name)
+        if layer.type != "Convolution":
+            continue
+        weights = layer.blobs[0]
+        filters = weights.shape[0]
+        if i + 1 < len(names) and net.getLayer(names[i + 1]).type == "BatchNorm":
+            parts += [np.zeros(filters), np.ones(filters), np.zeros(filters), np.ones(filters)]
+        else:
+            parts.append(rng.normal(0, 1, filters))
+        parts.append(rng.normal(0, np.sqrt(2.0 / np.prod(weights.shape[1:])), weights.size))
+
+    with open(path, "wb") as f:
+        f.write(struct.pack("<iiiq", 0, 2, 5, 0))
+        f.write(np.concatenate(parts).astype(np.float32).tobytes())
+
+
+def as_set(result):
+    class_ids, scores, boxes = result
+    return sorted(zip(np.ravel(class_ids).tolist(), np.round(np.ravel(scores), 5).tolist(),
+                      map(tuple, np.asarray(boxes).reshape(-1, 4).tolist())))
+
+
+def test_detect_batch_matches_detect(tmp_path):
+    weights = str(tmp_path / "random.weights")
+    write_random_weights(weights)
+    backend = OpenCVBackend(weights=weights, cfg=CFG, size=416)
+
+    frame = np.random.default_rng(1).integers(0, 256, (480, 640, 3), dtype=np.uint8)
+    single = backend.detect(frame)
+    batched = backend.detect_batch([frame, frame])
+
+    assert len(single[0]) > 0
+    assert as_set(batched[0]) == as_set(single)
+    assert as_set(batched[1]) == as_set(single)
+    assert (np.asarray(batched[0][2]).reshape(-1, 4)[:, :2] >= 0).all()
@@ -0,0 +1,77 @@
+import json
+import time
+
+from storage import StudyStore
+
+
+def write_log(path, events, tail=""):
+    with open(path, "w") as f:
+        for event in events:
+            f.write(json.dumps(event) + "\n")
+        f.write(tail)
+
+
+def wait_for_log(store, count, timeout=5.0):
+    """Waits until the writer has flushed `count` events to the log (the store stays 'crashed', not closed)."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with open(store.log_path, "r") as f:
+            if sum(1 for _ in f) >= count:
+                return
+        time.sleep(0.02)
+    raise AssertionError("writer did not flush in time")
+
+
+def test_replay_stops_at_torn_line(tmp_path):
+    store = StudyStore(str(tmp_path / "user_data.json"), fsync_interval=0.05)
+    write_log(store.log_path, [
+        {"type": "xp", "xp": 9, "level": 1, "seq": 1},
+        {"type": "task_add", "text": "Maths", "seq": 2},
+    ], tail='{"type": "xp", "xp": 1')
+
+    state = store.load()
+    try:
+        assert state["xp"] == 9
+        assert state["tasks"][-1]["text"] == "Maths"
+        assert state["seq"] == 2
+    finally:
+        store.close()
+
+
+def test_append_after_torn_line_survives_next_crash(tmp_path):
+    path = str(tmp_path / "user_data.json")
+    first = StudyStore(path, fsync_interval=0.05)
+    write_log(first.log_path, [{"type": "xp", "xp": 9, "level": 1, "seq": 1}], tail='{"type": "ta')
+
+    first.load()
+    first.append("task_add", text="Physics")
+    first.record_xp(42, 2)
+    first.flush()
+    wait_for_log(first, 3)  # Crash here: no close(), so no compaction
+
+    second = StudyStore(path, fsync_interval=0.05)
+    state = second.load()
+    try:
+        assert state["xp"] == 42
+        assert state["level"] == 2
+        assert state["tasks"][-1]["text"] == "Physics"
+    finally:
+        second.close()
+
+
+def test_replay_applies_events_logged_out_of_order(tmp_path):
+    # An XP event numbered after a task_add can reach the log first
+    store = StudyStore(str(tmp_path / "user_data.json"), fsync_interval=0.05)
+    write_log(store.log_path, [
+        {"type": "task_add", "text": "A", "seq": 1},
+        {"type": "xp", "xp": 5, "level": 1, "seq": 3},
+        {"type": "task_add", "text": "B", "seq": 2},
+    ])
+
+    state = store.load()
+    try:
+        assert [task["text"] for task in state["tasks"][-2:]] == ["A", "B"]
+        assert state["xp"] == 5
+        assert state["seq"] == 3
+    finally:
+        store.close()
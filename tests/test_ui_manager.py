@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("customtkinter")
+pytest.importorskip("PIL")
+
+import ui_manager
+
+
+class FakeLabel:
+    def configure(self, **kwargs):
+        pass
+
+
+class FakePhoto:
+    """Stands in for ImageTk.PhotoImage (no display needed); remembers what was pasted."""
+
+    def __init__(self, image):
+        self.pixels = None
+
+    def paste(self, image):
+        self.pixels = np.asarray(image).copy()
+
+
+def test_painted_image_follows_frames(monkeypatch):
+    monkeypatch.setattr(ui_manager.ImageTk, "PhotoImage", FakePhoto)
+    renderer = ui_manager.FrameRenderer(FakeLabel(), size=(40, 30))
+
+    red = np.zeros((60, 80, 3), dtype=np.uint8)
+    red[:, :, 2] = 255  # BGR
+    renderer.paint(red)
+    assert (renderer.photo.pixels[:, :, :3] == (255, 0, 0)).all()
+
+    blue = np.zeros((30, 40, 3), dtype=np.uint8)
+    blue[:, :, 0] = 255
+    renderer.paint(blue)
+    assert (renderer.photo.pixels[:, :, :3] == (0, 0, 255)).all()
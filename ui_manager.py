@@ -1,12 +1,53 @@
 import customtkinter as ctk
 import cv2
-from PIL import Image
+import numpy as np
+import tkinter as tk
+from PIL import Image, ImageTk
 from tkinter import messagebox
+from perf import perf
+
+VIDEO_SIZE = (400, 300)
+HISTORY_PAGE_SIZE = 20
+ALL_TASKS = "All tasks"
 
 # Set styling
 ctk.set_appearance_mode("light") 
 ctk.set_default_color_theme("green") 
 
+class FrameRenderer:
+    """Paints BGR frames into one Tk label with a fixed display size.
+
+    Frames are shrunk to display size *before* colour conversion, into
+    preallocated buffers; a PIL image maps the RGBA buffer (Pillow only
+    shares memory for modes like RGBA, not RGB) and a single PhotoImage is
+    updated in place with paste(), so painting a frame allocates nothing
+    new. Passing the same frame object twice is a no-op.
+    """
+
+    def __init__(self, label, size=VIDEO_SIZE):
+        self.label = label
+        self.size = size
+        width, height = size
+        self.bgr = np.empty((height, width, 3), dtype=np.uint8)
+        self.rgba = np.full((height, width, 4), 255, dtype=np.uint8)
+        self.image = Image.frombuffer("RGBA", size, self.rgba, "raw", "RGBA", 0, 1)
+        self.photo = ImageTk.PhotoImage(self.image)
+        self.label.configure(image=self.photo)
+        self.last_frame = None
+
+    def paint(self, frame):
+        if frame is self.last_frame:
+            return
+        self.last_frame = frame
+
+        if frame.shape[1] == self.size[0] and frame.shape[0] == self.size[1]:
+            src = frame  # Already at display size (e.g. cached partner video)
+        else:
+            src = cv2.resize(frame, self.size, dst=self.bgr, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(src, cv2.COLOR_BGR2RGBA, dst=self.rgba)
+        self.photo.paste(self.image)
+
+
 class StudyUI:
     def __init__(self, root, controller):
         self.root = root
@@ -56,6 +97,11 @@ class StudyUI:
                                            command=self.show_study_session)
         self.start_nav_btn.pack(pady=20, padx=20, fill="x")
 
+        # Shown while the camera / AI model load in the background
+        self.loading_label = ctk.CTkLabel(self.sidebar, text="", text_color="gray50",
+                                          font=ctk.CTkFont(size=11))
+        self.loading_label.pack(pady=(0, 10))
+
         # 2. Main Content Area
         self.content_area = ctk.CTkFrame(self.root, fg_color="transparent")
         self.content_area.pack(side="right", expand=True, fill="both", padx=20, pady=20)
@@ -64,6 +110,8 @@ class StudyUI:
         self.cam_label = None 
         self.partner_label = None
         self.timer_label = None
+        self.perf_label = None
+        self.renderers = {}
         
         self.show_dashboard()
 
@@ -76,6 +124,21 @@ class StudyUI:
         state = "ACTIVE" if is_active else "MUTED"
         print(f"[UI] Asian Mom Warnings: {state}")
 
+    def set_loading(self, pending):
+        """Locks the session view until the camera and AI are ready."""
+        self.start_nav_btn.configure(state="disabled", text="⏳ LOADING...")
+        self.loading_label.configure(text="Loading " + ", ".join(pending) if pending else "")
+
+    def set_ready(self):
+        self.start_nav_btn.configure(state="normal", text="🚀 START FOCUS")
+        self.loading_label.configure(text="")
+
+    def set_failed(self, failed):
+        """Keeps the session view locked when the camera or AI could not load."""
+        self.start_nav_btn.configure(state="disabled", text="❌ UNAVAILABLE")
+        self.loading_label.configure(text="Failed to load " + ", ".join(failed) + " (see console)",
+                                     text_color="#E74C3C")
+
     def nav_btn(self, text, icon, command):
         btn = ctk.CTkButton(self.sidebar, text=f"{icon}  {text}", 
                             command=command, height=45,
@@ -87,6 +150,8 @@ class StudyUI:
         self.cam_label = None
         self.partner_label = None
         self.timer_label = None
+        self.perf_label = None
+        self.renderers = {}
         for widget in self.content_area.winfo_children():
             widget.destroy()
 
@@ -110,11 +175,39 @@ class StudyUI:
         self.xp_bar.set(progress)
         self.xp_bar.pack(fill="x", padx=20, pady=15)
 
+        index = self.ctrl.engine.history_index
         stats_frame = ctk.CTkFrame(self.content_area, fg_color="transparent")
         stats_frame.pack(fill="x", padx=10)
-        self.create_stat_card(stats_frame, "Sessions Done", len(self.ctrl.engine.history))
+        self.create_stat_card(stats_frame, "Sessions Done", index.totals["sessions"])
+        self.create_stat_card(stats_frame, "Day Streak", f"{index.streak()} 🔥")
+        self.create_stat_card(stats_frame, "Minutes Today", index.today()["minutes"])
         self.create_stat_card(stats_frame, "Focus Topic", self.ctrl.engine.active_task)
 
+        self.show_insights_panel()
+
+    def show_insights_panel(self):
+        """Focus analytics over every recorded timeline (see analytics.py)."""
+        report = self.ctrl.focus_report()
+        if "focus_ratio" not in report:
+            return
+
+        ctk.CTkLabel(self.content_area, text="Focus Insights",
+                     font=ctk.CTkFont(size=18, weight="bold")).pack(pady=(15, 0), padx=20, anchor="w")
+        insights = ctk.CTkFrame(self.content_area, fg_color="transparent")
+        insights.pack(fill="x", padx=10)
+
+        refocus = report["median_refocus_s"]
+        onset = report["median_fatigue_onset_min"]
+        best = report["best_hour"]
+        self.create_stat_card(insights, "Focus Ratio", f"{report['focus_ratio']:.0%}")
+        self.create_stat_card(insights, "Refocus Time", f"{refocus:.0f}s" if refocus is not None else "-")
+        self.create_stat_card(insights, "Tired After", f"{onset:.0f} min" if onset is not None else "-")
+        self.create_stat_card(insights, "Best Hour", f"{best:02d}:00" if best is not None else "-")
+
+        distractions = "   ".join(f"{name.replace('_', ' ')}: {count}"
+                                  for name, count in report["distractions"].items())
+        ctk.CTkLabel(self.content_area, text=distractions, text_color="gray50").pack(padx=20, anchor="w")
+
     def create_stat_card(self, parent, title, value):
         card = ctk.CTkFrame(parent, corner_radius=15)
         card.pack(side="left", padx=10, pady=10, expand=True, fill="both")
@@ -160,6 +253,13 @@ class StudyUI:
                                         font=ctk.CTkFont(family="Consolas", size=80, weight="bold"))
         self.timer_label.pack(pady=10)
 
+        # Optional FPS/latency overlay (GUARDIAN_PERF=1)
+        if perf.enabled:
+            self.perf_label = ctk.CTkLabel(self.content_area, text="",
+                                           font=ctk.CTkFont(family="Consolas", size=12),
+                                           text_color="gray50")
+            self.perf_label.pack()
+
         video_box = ctk.CTkFrame(self.content_area, fg_color="transparent")
         video_box.pack(pady=10, fill="both", expand=True)
 
@@ -167,15 +267,13 @@ class StudyUI:
         left_box = ctk.CTkFrame(video_box, corner_radius=15, border_width=2, border_color="#27AE60")
         left_box.pack(side="left", expand=True, padx=10, fill="both")
         ctk.CTkLabel(left_box, text="AI GUARDIAN (YOU)", font=ctk.CTkFont(size=12, weight="bold")).pack(pady=5)
-        self.cam_label = ctk.CTkLabel(left_box, text="", width=400, height=300)
-        self.cam_label.pack(padx=10, pady=10)
+        self.cam_label = self.video_label(left_box)
 
         # Right Partner
         right_box = ctk.CTkFrame(video_box, corner_radius=15, border_width=2, border_color="#3498DB")
         right_box.pack(side="left", expand=True, padx=10, fill="both")
         ctk.CTkLabel(right_box, text="STUDY PARTNER", font=ctk.CTkFont(size=12, weight="bold")).pack(pady=5)
-        self.partner_label = ctk.CTkLabel(right_box, text="", width=400, height=300)
-        self.partner_label.pack(padx=10, pady=10)
+        self.partner_label = self.video_label(right_box)
 
         p_frame = ctk.CTkFrame(self.content_area, fg_color="transparent")
         p_frame.pack(pady=20)
@@ -185,18 +283,75 @@ class StudyUI:
 
         ctk.CTkButton(self.content_area, text="QUIT", fg_color="#E74C3C", command=self.ctrl.stop_session).pack(pady=10)
 
+    def video_label(self, parent):
+        # Plain Tk label: it shows our PhotoImage as-is, no per-frame CTkImage rescaling
+        label = tk.Label(parent, borderwidth=0, highlightthickness=0, bg="black")
+        label.pack(padx=10, pady=10)
+        self.renderers[label] = FrameRenderer(label)
+        return label
+
     def show_history(self):
         self.clear_content()
         ctk.CTkLabel(self.content_area, text="History Logs", font=ctk.CTkFont(size=28, weight="bold")).pack(pady=20, padx=20, anchor="w")
-        hist_scroll = ctk.CTkScrollableFrame(self.content_area, corner_radius=15)
-        hist_scroll.pack(fill="both", expand=True, padx=20, pady=10)
-        
-        for entry in reversed(self.ctrl.engine.history):
-            row = ctk.CTkFrame(hist_scroll, fg_color="transparent")
-            row.pack(fill="x", pady=2)
-            ctk.CTkLabel(row, text=entry['date'], width=150).pack(side="left")
-            ctk.CTkLabel(row, text=entry['task'], width=250, anchor="w").pack(side="left")
-            ctk.CTkLabel(row, text=f"+{entry['xp']} XP", text_color="#27AE60").pack(side="left")
+        index = self.ctrl.engine.history_index
+
+        # Filter + pager
+        controls = ctk.CTkFrame(self.content_area, fg_color="transparent")
+        controls.pack(fill="x", padx=20)
+        self.history_task = None
+        self.history_page = 0
+        ctk.CTkOptionMenu(controls, values=[ALL_TASKS] + sorted(index.by_task),
+                          command=self.set_history_task).pack(side="left")
+        ctk.CTkButton(controls, text="Next ▶", width=80,
+                      command=lambda: self.turn_history_page(1)).pack(side="right")
+        self.history_page_label = ctk.CTkLabel(controls, text="", width=120)
+        self.history_page_label.pack(side="right", padx=10)
+        ctk.CTkButton(controls, text="◀ Prev", width=80,
+                      command=lambda: self.turn_history_page(-1)).pack(side="right")
+
+        # A fixed set of row widgets, re-labelled for each page instead of one per session
+        hist_frame = ctk.CTkFrame(self.content_area, corner_radius=15)
+        hist_frame.pack(fill="both", expand=True, padx=20, pady=10)
+        self.history_rows = []
+        for _ in range(HISTORY_PAGE_SIZE):
+            row = ctk.CTkFrame(hist_frame, fg_color="transparent")
+            labels = (ctk.CTkLabel(row, text="", width=150),
+                      ctk.CTkLabel(row, text="", width=250, anchor="w"),
+                      ctk.CTkLabel(row, text="", width=80),
+                      ctk.CTkLabel(row, text="", text_color="#27AE60"))
+            for label in labels:
+                label.pack(side="left")
+            self.history_rows.append((row, labels))
+
+        self.render_history_page()
+
+    def set_history_task(self, task):
+        self.history_task = None if task == ALL_TASKS else task
+        self.history_page = 0
+        self.render_history_page()
+
+    def turn_history_page(self, step):
+        total = self.ctrl.engine.history_index.count(self.history_task)
+        last_page = max(0, (total - 1) // HISTORY_PAGE_SIZE)
+        self.history_page = min(max(0, self.history_page + step), last_page)
+        self.render_history_page()
+
+    def render_history_page(self):
+        index = self.ctrl.engine.history_index
+        entries = index.page(self.history_page, HISTORY_PAGE_SIZE, self.history_task)
+        pages = max(1, -(-index.count(self.history_task) // HISTORY_PAGE_SIZE))
+        self.history_page_label.configure(text=f"Page {self.history_page + 1} of {pages}")
+
+        for i, (row, (date_lbl, task_lbl, mins_lbl, xp_lbl)) in enumerate(self.history_rows):
+            if i < len(entries):
+                entry = entries[i]
+                date_lbl.configure(text=entry['date'])
+                task_lbl.configure(text=entry['task'])
+                mins_lbl.configure(text=f"{entry.get('duration', 0)} min")
+                xp_lbl.configure(text=f"+{entry['xp']} XP")
+                row.pack(fill="x", pady=2)
+            else:
+                row.pack_forget()
 
     def show_sounds(self):
         self.clear_content()
@@ -206,13 +361,17 @@ class StudyUI:
         else:
             ctk.CTkButton(self.content_area, text="Rain Lofi", command=lambda: self.ctrl.engine.play_lofi("rain")).pack(pady=10)
 
+    def update_perf_overlay(self):
+        if self.perf_label and self.perf_label.winfo_exists():
+            self.perf_label.configure(text=perf.overlay_text())
+
     def update_frame(self, label_widget, frame):
+        with perf.timer("ui.update_frame"):
+            self._update_frame(label_widget, frame)
+
+    def _update_frame(self, label_widget, frame):
         if label_widget and label_widget.winfo_exists():
             try:
-                img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                img_pil = Image.fromarray(img_rgb)
-                ctk_img = ctk.CTkImage(light_image=img_pil, dark_image=img_pil, size=(400, 300))
-                label_widget.configure(image=ctk_img)
-                label_widget.image = ctk_img 
+                self.renderers[label_widget].paint(frame)
             except Exception as e:
                 print(f"Frame update error: {e}")
\ No newline at end of file
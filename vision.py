@@ -1,96 +1,657 @@
 import cv2
+import math
 import numpy as np
 import time
+from backends import MODEL_CACHE_DIR, create_backend
+from perf import perf
+from focus_state import FocusStateMachine, Status
+
+# YOLO labels that drive the status logic; only these are tracked between detections
+TRACKED_LABELS = ("person", "cell phone")
+# Index into TRACKED_LABELS ("kind") used by Detections instead of label strings
+PERSON, PHONE = 0, 1
+LABEL_TEXT = tuple(label.upper() for label in TRACKED_LABELS)
+LABEL_COLORS = ((0, 255, 0), (0, 0, 255))
+STATUS_TEXT = {status: f"AI STATUS: {status.key.upper()}" for status in Status}
+
+# Confidence bands for DetectionCascade: below low = absent, at or above high = present,
+# anything in between is too close to call at low resolution
+CONFIDENCE_BANDS = {
+    "person": (0.3, 0.6),
+    "cell phone": (0.25, 0.5),
+}
+
+
+def kind_lookup(classes):
+    """COCO class id -> kind (PERSON / PHONE) table; -1 for every class the status logic ignores."""
+    table = np.full(max(len(classes), 1), -1, dtype=np.int8)
+    for kind, label in enumerate(TRACKED_LABELS):
+        if label in classes:
+            table[classes.index(label)] = kind
+    return table
+
+
+class Detections:
+    """One frame's YOLO output, reduced to people and phones.
+
+    Parallel NumPy arrays: ``kinds`` (PERSON/PHONE), ``scores`` and
+    ``boxes`` as (x, y, w, h) rows in frame pixels. Counting and lookups
+    are array operations, so no per-frame label strings are built.
+    """
+
+    __slots__ = ("kinds", "scores", "boxes")
+
+    def __init__(self, kinds, scores, boxes):
+        self.kinds = kinds
+        self.scores = scores
+        self.boxes = boxes
+
+    @classmethod
+    def from_backend(cls, kind_table, class_ids, scores, boxes):
+        """Filters raw detect() arrays to the tracked classes in one vectorized pass."""
+        class_ids = np.asarray(class_ids, dtype=np.intp).reshape(-1)
+        kinds = kind_table[class_ids] if len(class_ids) else np.empty(0, dtype=np.int8)
+        keep = kinds >= 0
+        return cls(kinds[keep],
+                   np.asarray(scores, dtype=np.float32).reshape(-1)[keep],
+                   np.asarray(boxes, dtype=np.int32).reshape(-1, 4)[keep])
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty(0, dtype=np.int8), np.empty(0, dtype=np.float32), np.empty((0, 4), dtype=np.int32))
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __iter__(self):
+        """(kind, score, box) tuples, for the few callers that walk every detection."""
+        for kind, score, box in zip(self.kinds, self.scores, self.boxes):
+            yield int(kind), float(score), tuple(int(v) for v in box)
+
+    @property
+    def person_count(self):
+        return int(np.count_nonzero(self.kinds == PERSON))
+
+    @property
+    def phone_seen(self):
+        return bool((self.kinds == PHONE).any())
+
+    @property
+    def phone_score(self):
+        """Highest phone confidence in the frame (0 without a phone)."""
+        scores = self.scores[self.kinds == PHONE]
+        return float(scores.max()) if len(scores) else 0.0
+
+    def largest_person(self):
+        """Biggest person box (the student closest to the camera), or None."""
+        people = self.boxes[self.kinds == PERSON]
+        if not len(people):
+            return None
+        return tuple(int(v) for v in people[np.argmax(people[:, 2] * people[:, 3])])
+
+
+class AnalysisResult:
+    """What analyze() returns for one frame."""
+
+    __slots__ = ("status", "detections", "face", "eyes", "time", "eyes_closed_for")
+
+    def __init__(self, status, detections, face=None, eyes=(), time=None, eyes_closed_for=0.0):
+        self.status = status          # Status
+        self.detections = detections  # Detections
+        self.face = face              # (x, y, w, h) or None
+        self.eyes = eyes              # [(x, y, w, h), ...] in frame coordinates
+        self.time = time              # Frame time in seconds
+        self.eyes_closed_for = eyes_closed_for
+
+    @classmethod
+    def away(cls):
+        """Stand-in result for when there is no frame at all (camera unplugged)."""
+        return cls(Status.AWAY, Detections.empty())
+
+    def with_status(self, status):
+        return AnalysisResult(status, self.detections, self.face, self.eyes)
+
+
+def observations(detections, face, eyes):
+    """(person_count, phone_seen, eyes_closed) for FocusStateMachine.update; eyes_closed is None without a face."""
+    eyes_closed = None if face is None else len(eyes) == 0
+    return detections.person_count, detections.phone_seen, eyes_closed
+
+
+def _create_tracker():
+    """Cheapest OpenCV tracker available in this build (MOSSE/KCF need opencv-contrib)."""
+    legacy = getattr(cv2, "legacy", None)
+    for factory in (getattr(legacy, "TrackerMOSSE_create", None),
+                    getattr(cv2, "TrackerKCF_create", None),
+                    getattr(cv2, "TrackerMIL_create", None)):
+        if factory is not None:
+            return factory()
+    return None
+
+
+class DetectionScheduler:
+    """Decides which frames get a full YOLO pass; trackers carry boxes in between.
+
+    The interval N is re-derived after every detection so that YOLO uses at
+    most cpu_budget of each frame's time slot at target_fps.
+    """
+
+    def __init__(self, target_fps=30, cpu_budget=0.35, min_interval=1, max_interval=15):
+        self.frame_time = 1.0 / target_fps
+        self.cpu_budget = cpu_budget
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+
+        self.interval = min_interval
+        self.avg_latency = None
+        self._since_detection = 0
+        self._force = True
+
+        # Counters
+        self.detected_frames = 0
+        self.tracked_frames = 0
+
+    def should_detect(self):
+        return self._force or self._since_detection >= self.interval - 1
+
+    def request_detection(self):
+        """Forces YOLO on the next frame (scene change, lost track, ...)."""
+        self._force = True
+
+    def record_detection(self, latency):
+        if self.avg_latency is None:
+            self.avg_latency = latency
+        else:
+            self.avg_latency = 0.8 * self.avg_latency + 0.2 * latency
+
+        wanted = math.ceil(self.avg_latency / (self.cpu_budget * self.frame_time))
+        self.interval = max(self.min_interval, min(self.max_interval, wanted))
+        self._since_detection = 0
+        self._force = False
+        self.detected_frames += 1
+
+    def record_tracked(self):
+        self._since_detection += 1
+        self.tracked_frames += 1
+
+
+class MotionGate:
+    """Cheap downsampled frame-difference check in front of the detector.
+
+    Each frame is shrunk to a tiny grayscale thumbnail and compared with the
+    thumbnail of the last frame that was actually analyzed. check() returns
+    one of STATIC, MOTION or SCENE_CHANGE based on the fraction of pixels
+    that moved by more than pixel_threshold.
+    """
+
+    STATIC = "static"
+    MOTION = "motion"
+    SCENE_CHANGE = "scene_change"
+
+    def __init__(self, size=(64, 48), pixel_threshold=12, motion_fraction=0.01,
+                 scene_fraction=0.30, max_skip=15):
+        self.size = size
+        self.pixel_threshold = pixel_threshold
+        self.motion_fraction = motion_fraction
+        self.scene_fraction = scene_fraction
+        self.max_skip = max_skip  # Re-analyze at least this often, even if nothing moves
+
+        self.reference = None
+        self._skipped_in_row = 0
+
+        # Counters
+        self.checked_frames = 0
+        self.skipped_frames = 0
+
+    @property
+    def skip_ratio(self):
+        return self.skipped_frames / self.checked_frames if self.checked_frames else 0.0
+
+    def check(self, frame):
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        self.checked_frames += 1
+
+        if self.reference is None:
+            self.reference = small
+            return self.SCENE_CHANGE
+
+        diff = cv2.absdiff(small, self.reference)
+        changed = np.count_nonzero(diff > self.pixel_threshold) / diff.size
+
+        if changed < self.motion_fraction and self._skipped_in_row < self.max_skip:
+            self._skipped_in_row += 1
+            self.skipped_frames += 1
+            return self.STATIC
+
+        self._skipped_in_row = 0
+        self.reference = small
+        return self.SCENE_CHANGE if changed >= self.scene_fraction else self.MOTION
+
+    def reset(self):
+        self.reference = None
+        self._skipped_in_row = 0
+
+
+class DetectionCascade:
+    """Cheap low-resolution YOLO pass that escalates to the full network only when needed.
+
+    Most frames just confirm "one person, no phone". The low tier runs the
+    same weights at a small input size (e.g. 224) and answers by itself
+    when every person/phone score is clearly outside its confidence band
+    and the answer matches the last one. A full-size pass runs on
+    uncertainty, on a change, and every refresh_every frames regardless.
+    detect() has the backend signature, so StudyDetector just swaps it in.
+    """
+
+    def __init__(self, low_backend, full_backend, classes, bands=None, refresh_every=30):
+        self.low = low_backend
+        self.full = full_backend
+        bands = dict(CONFIDENCE_BANDS, **(bands or {}))
+        self.bands = {classes.index(label): band for label, band in bands.items()}
+        self.person_id = classes.index("person")
+        self.phone_id = classes.index("cell phone")
+        self.refresh_every = refresh_every
+
+        self.last_answer = None  # (person count, phone seen) from the last frame
+        self._since_full = 0
+
+        # How often each tier answered, and why the full pass was needed
+        self.stats = {"low": 0, "uncertain": 0, "changed": 0, "refresh": 0}
+
+    def detect(self, frame, conf_threshold=0.5, nms_threshold=0.4):
+        floor = min(low for low, _ in self.bands.values())
+        class_ids, scores, boxes = self.low.detect(frame, min(floor, conf_threshold), nms_threshold)
+        class_ids = np.asarray(class_ids).reshape(-1)
+        scores = np.asarray(scores).reshape(-1)
+        boxes = np.asarray(boxes).reshape(-1, 4)
+
+        reason = self._escalation(class_ids, scores)
+        if reason is None:
+            self.stats["low"] += 1
+            self._since_full += 1
+            keep = scores >= conf_threshold
+            return class_ids[keep], scores[keep], boxes[keep]
+
+        self.stats[reason] += 1
+        self._since_full = 0
+        result = self.full.detect(frame, conf_threshold, nms_threshold)
+        full_ids = np.asarray(result[0]).reshape(-1)
+        self.last_answer = (int(np.count_nonzero(full_ids == self.person_id)), bool((full_ids == self.phone_id).any()))
+        return result
+
+    def _escalation(self, class_ids, scores):
+        """Why the full pass is needed for this frame, or None if the low tier's answer stands."""
+        if self.last_answer is None or self._since_full >= self.refresh_every:
+            return "refresh"
+        for class_id, (low, high) in self.bands.items():
+            band = scores[class_ids == class_id]
+            if ((band >= low) & (band < high)).any():
+                return "uncertain"
+
+        persons = int(np.count_nonzero((class_ids == self.person_id) & (scores >= self.bands[self.person_id][1])))
+        phone = bool(((class_ids == self.phone_id) & (scores >= self.bands[self.phone_id][1])).any())
+        if (persons, phone) != self.last_answer:
+            return "changed"
+        return None
+
+    @property
+    def low_ratio(self):
+        total = sum(self.stats.values())
+        return self.stats["low"] / total if total else 0.0
+
+    def reset(self):
+        self.last_answer = None
+        self._since_full = 0
+
+
+class FaceTracker:
+    """Finds the main face without running Haar over the full frame every time.
+
+    The face cascade runs on a downscaled crop around the last known face,
+    then inside the YOLO person box, and only falls back to a (still
+    downscaled) full-frame search once the face is lost. Eyes are searched
+    in the face crop shrunk to eye_width pixels.
+    """
+
+    def __init__(self, face_cascade, eye_cascade, work_width=320, margin=0.5, eye_width=160):
+        self.face_cascade = face_cascade
+        self.eye_cascade = eye_cascade
+        self.work_width = work_width  # Frame width the face search effectively runs at
+        self.margin = margin          # ROI padding around the last face, relative to its size
+        self.eye_width = eye_width
+
+        self.last_face = None
+
+        # Counters
+        self.roi_searches = 0
+        self.full_searches = 0
+
+    def find(self, frame, person_box=None):
+        frame_h, frame_w = frame.shape[:2]
+        scale = min(1.0, self.work_width / frame_w)
+
+        face = None
+        if self.last_face is not None:
+            x, y, w, h = self.last_face
+            pad_w, pad_h = int(w * self.margin), int(h * self.margin)
+            self.roi_searches += 1
+            face = self._search(frame, (x - pad_w, y - pad_h, w + 2 * pad_w, h + 2 * pad_h), scale)
+
+        if face is None and person_box is not None:
+            self.roi_searches += 1
+            face = self._search(frame, person_box, scale)
+
+        if face is None:
+            # Face lost: re-detect over the whole frame
+            self.full_searches += 1
+            face = self._search(frame, (0, 0, frame_w, frame_h), scale)
+
+        self.last_face = face
+        return face
+
+    def _search(self, frame, region, scale):
+        frame_h, frame_w = frame.shape[:2]
+        x, y, w, h = region
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(frame_w, x + w), min(frame_h, y + h)
+        if (x1 - x0) * scale < 24 or (y1 - y0) * scale < 24:
+            return None  # Smaller than the cascade's 24x24 window
+
+        roi = frame[y0:y1, x0:x1]
+        if scale < 1.0:
+            roi = cv2.resize(roi, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+
+        faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
+        if len(faces) == 0:
+            return None
+
+        # Keep the biggest face: that's the student, not someone in the background
+        fx, fy, fw, fh = max(faces, key=lambda f: f[2] * f[3])
+        return (x0 + int(fx / scale), y0 + int(fy / scale), int(fw / scale), int(fh / scale))
+
+    def find_eyes(self, frame, face):
+        x, y, w, h = face
+        roi = frame[y:y+h, x:x+w]
+        scale = min(1.0, self.eye_width / max(w, 1))
+        if scale < 1.0:
+            roi = cv2.resize(roi, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+
+        eyes = self.eye_cascade.detectMultiScale(gray, 1.1, 10)
+        return [(x + int(ex / scale), y + int(ey / scale), int(ew / scale), int(eh / scale))
+                for (ex, ey, ew, eh) in eyes]
+
 
 class StudyDetector:
-    def __init__(self):
-        # 1. Initialize Camera
-        self.cap = cv2.VideoCapture(0)
-        
-        # 2. Load YOLOv4-tiny (Objects: Phone, Person)
+    def __init__(self, adaptive_detection=False, motion_gate=False,
+                 backend="opencv", input_size=416, threads=None, int8=False, model_path=None,
+                 source=0, load=True, cache_dir=MODEL_CACHE_DIR, warm_up=True,
+                 tiered_detection=False, low_res_size=224, confidence_bands=None):
+        self.source = source
+        self.is_file = isinstance(source, str)
+        self.backend_options = {"name": backend, "size": input_size, "threads": threads,
+                                "model_path": model_path, "int8": int8, "cache_dir": cache_dir}
+        self.warm_up = warm_up
+        self.tier_options = {"size": low_res_size, "bands": confidence_bands} if tiered_detection else None
+
+        # Heavy resources: loaded right away, or by the caller (in parallel) when load=False
+        self.cap = None
+        self.backend = None
+        self.classes = []
+        self.kind_table = kind_lookup([])
+        self.face_cascade = None
+        self.eye_cascade = None
+        self.face_tracker = None
+        self.detection_cascade = None  # DetectionCascade when the low-res tier is enabled
+
+        # 4. Time-based status logic (fatigue, away, phone, multiple people)
+        self.state = FocusStateMachine()
+
+        # 5. Adaptive Scheduling (YOLO every N frames, trackers in between)
+        self.scheduler = DetectionScheduler() if adaptive_detection else None
+        self.trackers = []  # One per tracked detection, same order as tracked_kinds / tracked_scores
+        self.tracked_kinds = np.empty(0, dtype=np.int8)
+        self.tracked_scores = np.empty(0, dtype=np.float32)
+
+        # 6. Motion Gate (reuse the last result while the scene is static)
+        self.motion_gate = MotionGate() if motion_gate else None
+        self.last_result = None
+
+        # 7. Per-stage timings (seconds) of the last analyze() call
+        self.stage_times = {"gate": 0.0, "yolo": 0.0, "face": 0.0, "eyes": 0.0}
+
+        if load:
+            self.open_camera()
+            self.load_model()
+            self.load_cascades()
+
+    def open_camera(self):
+        # 1. Initialize Camera (or a recorded clip when source is a file path;
+        #    None when frames come from elsewhere, e.g. the /analyze API)
+        if self.source is not None:
+            self.cap = cv2.VideoCapture(self.source)
+
+    def load_model(self):
+        # 2. Load YOLOv4-tiny (Objects: Phone, Person) on the chosen CPU backend
         try:
-            self.net = cv2.dnn.readNet("yolov4-tiny.weights", "yolov4-tiny.cfg")
-            self.model = cv2.dnn_DetectionModel(self.net)
-            self.model.setInputParams(size=(416, 416), scale=1/255, swapRB=True)
-            
-            with open("coco.names", "r") as f:
-                self.classes = [line.strip() for line in f.readlines()]
+            self.backend = create_backend(**self.backend_options)
+            self.classes = self.backend.class_names("coco.names")
+            self.kind_table = kind_lookup(self.classes)
+            # A couple of dummy frames now, so the first real one runs at steady-state speed
+            # (and a backend that can't run at this input size fails here, not on every frame)
+            if self.warm_up:
+                first, *rest = self.backend.warm_up()
+                cached = " (cached model)" if self.backend.cache_hit else ""
+                print(f"🔥 YOLO warm-up{cached}: first {first:.0f} ms, then {rest[-1] if rest else first:.0f} ms")
         except Exception as e:
             print(f"❌ YOLO Error: {e}. Check weights/cfg/names files.")
+            self.backend = None
+            raise  # Callers (StartupLoader, the remote batcher) decide what a missing model means
+
+        # Optional cheap tier: same weights at a small input size
+        if self.tier_options is not None:
+            try:
+                low = create_backend(**dict(self.backend_options, size=self.tier_options["size"]))
+                if self.warm_up:
+                    low.warm_up()
+                self.detection_cascade = DetectionCascade(low, self.backend, self.classes, self.tier_options["bands"])
+            except Exception as e:
+                print(f"⚠️ Detection cascade disabled: {e}")
 
+    def load_cascades(self):
         # 3. Load Haar Cascades (Physiological: Face, Eyes)
         # These are built into OpenCV; no extra files needed
         self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
         self.eye_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
+        self.face_tracker = FaceTracker(self.face_cascade, self.eye_cascade)
+
+    def reset(self):
+        """Forgets the previous stream (e.g. the next video of a batch) but keeps the loaded models."""
+        self.state = FocusStateMachine()
+        if self.face_cascade is not None:
+            self.face_tracker = FaceTracker(self.face_cascade, self.eye_cascade)
+        if self.scheduler is not None:
+            self.scheduler = DetectionScheduler()
+        self.trackers = []
+        if self.motion_gate is not None:
+            self.motion_gate.reset()
+        if self.detection_cascade is not None:
+            self.detection_cascade.reset()
+        self.last_result = None
 
-        # 4. Fatigue Tracking Variables
-        self.eyes_closed_counter = 0
-        self.TIRED_THRESHOLD = 25  # Approx 1 second of closed eyes
-        
     def get_user_status(self):
+        """Synchronous capture -> analyze -> draw, kept for callers that don't use VisionPipeline."""
+        frame = self.read_frame()
+        if frame is None:
+            return None, Status.AWAY
+
+        result = self.analyze(frame, self.frame_time())
+        self.draw(frame, result)
+        return frame, result.status
+
+    def frame_time(self):
+        """Timestamp of the last frame read: the clip position for video files, the clock for cameras."""
+        if self.is_file:
+            return self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+        return time.monotonic()
+
+    def read_frame(self):
+        if self.cap is None:
+            return None
         ret, frame = self.cap.read()
-        if not ret:
-            return None, "away"
+        return frame if ret else None
+
+    def analyze(self, frame, now=None):
+        """Runs detection on a clean frame and returns the result without drawing on it.
+
+        The result is an AnalysisResult with the final ``status`` (a Status),
+        the person/phone ``detections`` (Detections) and the monitored
+        ``face`` / ``eyes`` boxes in frame coordinates. ``now`` is the frame's
+        capture time in seconds (monotonic clock by default); statuses are
+        debounced on it and it is returned as ``time``, with
+        ``eyes_closed_for`` in seconds.
+        """
+        if now is None:
+            now = time.monotonic()
+        result = self._analyze(frame, now)
+        result.time = now
+        result.eyes_closed_for = self.state.eyes_closed_for(now)
+        if perf.enabled:
+            for stage, seconds in self.stage_times.items():
+                perf.record(f"vision.{stage}", seconds)
+        return result
+
+    def _analyze(self, frame, now):
+        times = self.stage_times
+        for stage in times:
+            times[stage] = 0.0
+
+        # --- STEP 0: MOTION GATE (Skip static frames) ---
+        if self.motion_gate is not None:
+            t0 = time.perf_counter()
+            change = self.motion_gate.check(frame)
+            times["gate"] = time.perf_counter() - t0
+            if change == MotionGate.STATIC and self.last_result is not None:
+                return self.reuse_last_result(now)
+            if change == MotionGate.SCENE_CHANGE and self.scheduler is not None:
+                self.scheduler.request_detection()
 
         # --- STEP A: YOLO DETECTION (Phones & People) ---
-        classes, scores, boxes = self.model.detect(frame, confThreshold=0.5, nmsThreshold=0.4)
-        detected_labels = []
-        
-        for (classid, score, box) in zip(classes, scores, boxes):
-            label = self.classes[classid]
-            detected_labels.append(label)
-            
-            # Draw YOLO Bounding Boxes
-            color = (0, 255, 0) if label == "person" else (0, 0, 255)
-            cv2.rectangle(frame, box, color, 2)
-            cv2.putText(frame, f"{label.upper()}", (box[0], box[1] - 10), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+        t0 = time.perf_counter()
+        detections = None
+        if self.scheduler is not None and not self.scheduler.should_detect():
+            detections = self.track_objects(frame)
+
+        if detections is None:
+            start = time.perf_counter()
+            detections = self.detect_objects(frame)
+            if self.scheduler is not None:
+                self.scheduler.record_detection(time.perf_counter() - start)
+                self.init_trackers(frame, detections)
+        times["yolo"] = time.perf_counter() - t0
 
         # --- STEP B: HAAR CASCADE (Tiredness Detection) ---
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
-        
-        is_tired = False
-        if len(faces) > 0:
-            # We only analyze the first (main) face detected
-            (x, y, w, h) = faces[0]
-            roi_gray = gray[y:y+h, x:x+w]
-            
-            # Search for eyes ONLY inside the face area
-            eyes = self.eye_cascade.detectMultiScale(roi_gray, 1.1, 10)
-            
-            # Draw a small box for the face being monitored
-            cv2.rectangle(frame, (x, y), (x+w, y+h), (255, 255, 0), 1)
+        t0 = time.perf_counter()
+        face = self.face_tracker.find(frame, detections.largest_person())
+        times["face"] = time.perf_counter() - t0
 
-            if len(eyes) == 0:
-                self.eyes_closed_counter += 1
-                if self.eyes_closed_counter >= self.TIRED_THRESHOLD:
-                    is_tired = True
-            else:
-                self.eyes_closed_counter = 0
-                # Optional: Draw boxes around eyes for visual feedback
-                for (ex, ey, ew, eh) in eyes:
-                    cv2.rectangle(frame, (x+ex, y+ey), (x+ex+ew, y+ey+eh), (255, 255, 255), 1)
+        eyes = []
+        if face is not None:
+            # Search for eyes ONLY inside the face area
+            t0 = time.perf_counter()
+            eyes = self.face_tracker.find_eyes(frame, face)
+            times["eyes"] = time.perf_counter() - t0
 
         # --- STEP C: LOGIC PRIORITY ---
-        person_count = detected_labels.count("person")
-        
-        if person_count == 0:
-            status = "away"
-        elif is_tired:
-            status = "tired"
-        elif "cell phone" in detected_labels:
-            status = "phone"
-        elif person_count > 1:
-            status = "multiple_people"
-        else:
-            status = "focus"
+        status = self.classify(detections, face, eyes, now)
+
+        self.last_result = AnalysisResult(status, detections, face, eyes)
+        return self.last_result
+
+    def classify(self, detections, face, eyes, now):
+        return self.state.update(*observations(detections, face, eyes), now)
+
+    def reuse_last_result(self, now):
+        """Result for a frame the motion gate skipped: same observations, but the clock keeps running."""
+        result = self.last_result
+        status = self.classify(result.detections, result.face, result.eyes, now)
+        return result.with_status(status)
+
+    def detect_objects(self, frame):
+        detector = self.detection_cascade if self.detection_cascade is not None else self.backend
+        return self.to_detections(*detector.detect(frame, 0.5, 0.4))
+
+    def to_detections(self, classes, scores, boxes):
+        """Backend arrays -> Detections of people and phones only."""
+        return Detections.from_backend(self.kind_table, classes, scores, boxes)
+
+    def init_trackers(self, frame, detections):
+        self.trackers = []
+        frame_h, frame_w = frame.shape[:2]
+        kinds, scores = [], []
+        for (kind, score, (x, y, w, h)) in detections:
+            tracker = _create_tracker()
+            if tracker is None:
+                # No tracker in this OpenCV build: fall back to YOLO every frame
+                self.scheduler = None
+                self.trackers = []
+                return
+            # Trackers reject boxes that leave the image
+            x, y = max(0, x), max(0, y)
+            w, h = min(w, frame_w - x), min(h, frame_h - y)
+            if w > 1 and h > 1:
+                tracker.init(frame, (x, y, w, h))
+                self.trackers.append(tracker)
+                kinds.append(kind)
+                scores.append(score)
+        self.tracked_kinds = np.array(kinds, dtype=np.int8)
+        self.tracked_scores = np.array(scores, dtype=np.float32)
+
+    def track_objects(self, frame):
+        """Propagates the last YOLO boxes; returns None if any track was lost."""
+        boxes = np.empty((len(self.trackers), 4), dtype=np.int32)
+        for i, tracker in enumerate(self.trackers):
+            ok, box = tracker.update(frame)
+            if not ok:
+                return None
+            boxes[i] = box
+
+        self.scheduler.record_tracked()
+        return Detections(self.tracked_kinds, self.tracked_scores, boxes)
+
+    def draw(self, frame, result):
+        """Paints the boxes and status of an analyze() result onto frame (in place)."""
+        # Draw YOLO Bounding Boxes
+        for (kind, _, box) in result.detections:
+            color = LABEL_COLORS[kind]
+            cv2.rectangle(frame, box, color, 2)
+            cv2.putText(frame, LABEL_TEXT[kind], (box[0], box[1] - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+
+        # Draw a small box for the face being monitored
+        if result.face is not None:
+            (x, y, w, h) = result.face
+            cv2.rectangle(frame, (x, y), (x+w, y+h), (255, 255, 0), 1)
+
+        # Optional: Draw boxes around eyes for visual feedback
+        for (ex, ey, ew, eh) in result.eyes:
+            cv2.rectangle(frame, (ex, ey), (ex+ew, ey+eh), (255, 255, 255), 1)
 
         # Display Final Status on Frame
-        cv2.putText(frame, f"AI STATUS: {status.upper()}", (20, 50), 
+        cv2.putText(frame, STATUS_TEXT[result.status], (20, 50),
                     cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 3)
-
-        return frame, status
+        return frame
 
     def cleanup(self):
-        self.cap.release()
\ No newline at end of file
+        if self.motion_gate is not None:
+            print(f"📉 Motion gate skipped {self.motion_gate.skip_ratio:.0%} of "
+                  f"{self.motion_gate.checked_frames} frames")
+        if self.detection_cascade is not None:
+            stats = self.detection_cascade.stats
+            print(f"🪜 Low-res tier answered {self.detection_cascade.low_ratio:.0%} of YOLO calls "
+                  f"(full pass: {stats['uncertain']} uncertain, {stats['changed']} changed, "
+                  f"{stats['refresh']} refresh)")
+        if self.cap is not None:
+            self.cap.release()
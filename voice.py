@@ -1,36 +1,278 @@
-import pyttsx3
+import hashlib
+import os
 import threading
-import queue
 import time
+import wave
 
-class VoiceManager:
-    def __init__(self, cooldown=10):
-        self.engine = pyttsx3.init()
-        self.engine.setProperty("rate", 170)
+import pyttsx3
 
-        self.queue = queue.Queue()
-        self.cooldown = cooldown
-        self.last_spoken = 0
+from modes import all_messages
+
+try:
+    import winsound
+except ImportError:
+    winsound = None
+
+try:
+    import numpy as np
+    import sounddevice as sd
+except ImportError:
+    sd = None
+
+
+# Higher speaks first when several messages are waiting
+PRIORITIES = {
+    "phone": 3,
+    "multiple_people": 3,
+    "away": 2,
+    "tired": 2,
+    "announcement": 1,
+    "info": 1,
+    "encouragement": 0,
+}
+
+# Minimum seconds between two spoken messages of the same category
+COOLDOWNS = {
+    "phone": 10,
+    "multiple_people": 10,
+    "away": 10,
+    "tired": 10,
+    "encouragement": 30,
+}
+
+# Categories that go stale the moment the student refocuses
+WARNING_CATEGORIES = ("phone", "multiple_people", "away", "tired")
+
+
+class VoiceService:
+    """One long-lived TTS engine plus an on-disk cache of rendered phrases.
+
+    pyttsx3 engines must stay on the thread that created them, so the
+    engine lives on the worker thread for the whole run. Phrases are
+    rendered to WAV once (keyed by text + rate + voice), kept in memory,
+    and played back directly; only unknown text waits for the synthesizer.
+    On Windows the cached file is played with SND_ASYNC so cancel() can
+    cut it off; live pyttsx3 speech (no cache) always plays to the end.
+
+    Waiting messages are held one per category (a newer message replaces
+    the older one), spoken highest priority first, dropped once older than
+    max_age, and can be cancelled, e.g. when the student is focused again.
+    """
+
+    def __init__(self, rate=170, voice_id=None, cache_dir=os.path.join(".cache", "voice"), preload=(),
+                 cooldowns=None, max_age=6.0):
+        self.rate = rate
+        self.voice_id = voice_id
+        self.cache_dir = cache_dir
+        self.preload = list(preload)
+        self.cooldowns = dict(COOLDOWNS, **(cooldowns or {}))
+        self.max_age = max_age
+
+        self._cond = threading.Condition()
+        self._pending = {}      # category -> (priority, queued_at, text)
+        self._last_spoken = {}  # category -> monotonic time
+        self._stopping = False
+        self.speaking = None    # Category currently being played
+        self._interrupted = threading.Event()  # Set by cancel() to cut off the current playback
+        self.ready = threading.Event()  # Set once the engine is up (or failed to start)
+
+        self.audio = {}  # cache path -> decoded audio, ready to play
+        self.can_play_files = winsound is not None or sd is not None
+
+        self.thread = threading.Thread(target=self._worker, daemon=True)
+        self.thread.start()
+
+    # --------------------------------
+    # Public API (any thread)
+    # --------------------------------
+    def say(self, text, category="info"):
+        """Queues text; returns False if it was dropped by the category cooldown."""
+        if not text:
+            return False
+
+        now = time.monotonic()
+        with self._cond:
+            if self._stopping:
+                return False
+            last = self._last_spoken.get(category)
+            if last is not None and now - last < self.cooldowns.get(category, 0):
+                return False
+            self._pending[category] = (PRIORITIES.get(category, 1), now, text)
+            self._cond.notify()
+        return True
+
+    def cancel(self, categories=None):
+        """Drops waiting messages (all, or just these categories) and cuts off matching playback."""
+        with self._cond:
+            for category in list(self._pending):
+                if categories is None or category in categories:
+                    del self._pending[category]
+            interrupt = self.speaking is not None and (categories is None or self.speaking in categories)
+
+        if interrupt:
+            self._interrupted.set()
+            if winsound is not None:
+                winsound.PlaySound(None, 0)  # Stops the SND_ASYNC sound started by _speak
+            elif sd is not None:
+                sd.stop()
 
-        threading.Thread(target=self._worker, daemon=True).start()
+    def wait_ready(self, timeout=None):
+        """Blocks until the TTS engine has started; returns False on timeout."""
+        return self.ready.wait(timeout)
+
+    def shutdown(self):
+        """Non-blocking: stops accepting messages and lets the worker exit on its own."""
+        with self._cond:
+            self._stopping = True
+            self._pending.clear()
+            self._cond.notify()
+        self.cancel()
+
+    # --------------------------------
+    # Worker Thread
+    # --------------------------------
+    def _next_message(self, wait):
+        """Pops the most urgent fresh message; returns (category, text), None if idle, or False to stop."""
+        with self._cond:
+            if wait:
+                self._cond.wait_for(lambda: self._pending or self._stopping)
+            if self._stopping:
+                return False
+
+            now = time.monotonic()
+            for category, (_, queued_at, _) in list(self._pending.items()):
+                if now - queued_at > self.max_age:
+                    del self._pending[category]
+            if not self._pending:
+                return None
+
+            category = max(self._pending, key=lambda c: self._pending[c][:2])
+            _, _, text = self._pending.pop(category)
+            self._last_spoken[category] = now
+            self.speaking = category
+            self._interrupted.clear()
+            return category, text
 
     def _worker(self):
+        print("🔊 Voice Worker Started")
+        try:
+            self.engine = pyttsx3.init()
+            self.engine.setProperty("rate", self.rate)
+            if self.voice_id:
+                self.engine.setProperty("voice", self.voice_id)
+        except Exception as e:
+            print(f"❌ Voice Init Error: {e}")
+            return
+        finally:
+            self.ready.set()
+
+        # Pre-render known phrases, but let real messages jump the line
+        pending = list(self.preload)
         while True:
-            text = self.queue.get()
-            if text is None:
+            item = self._next_message(wait=not pending)
+            if item is False:
+                print("👋 Voice Worker Stopping")
                 break
+            if item is None:
+                if pending:
+                    self._render(pending.pop(0))
+                continue
 
+            category, msg = item
             try:
-                self.engine.say(text)
-                self.engine.runAndWait()
+                print(f"🎙️ Engine Speaking [{category}]: {msg}")
+                self._speak(msg)
             except Exception as e:
-                print("Voice error:", e)
+                print(f"❌ Voice Output Error: {e}")
+            finally:
+                with self._cond:
+                    self.speaking = None
+
+    def cache_path(self, text):
+        voice = self.voice_id or "default"
+        key = hashlib.sha1(f"{text}|{self.rate}|{voice}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.wav")
+
+    def _render(self, text):
+        """Synthesizes text to the cache (if needed) and loads it; returns the audio or None."""
+        if not self.can_play_files:
+            return None
+        path = self.cache_path(text)
+        if path in self.audio:
+            return self.audio[path]
+
+        try:
+            if not os.path.exists(path):
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp_path = path + ".tmp.wav"
+                self.engine.save_to_file(text, tmp_path)
+                self.engine.runAndWait()
+                os.replace(tmp_path, path)
+            self.audio[path] = self._load(path)
+        except Exception as e:
+            # Some drivers can't write WAV (e.g. AIFF on macOS): just speak live
+            print(f"⚠️ Voice Cache Skipped: {e}")
+            self.audio[path] = None
+        return self.audio[path]
+
+    def _load(self, path):
+        with wave.open(path, "rb") as w:
+            if winsound is not None:
+                # winsound can't play from memory asynchronously, so keep the file and its length
+                return path, w.getnframes() / w.getframerate()
+            if w.getsampwidth() != 2:
+                raise ValueError(f"Unsupported sample width {w.getsampwidth()}")
+            frames = w.readframes(w.getnframes())
+            data = np.frombuffer(frames, dtype=np.int16).reshape(-1, w.getnchannels())
+            return data, w.getframerate()
+
+    def _speak(self, text):
+        audio = self._render(text)
+        if audio is None:
+            self.engine.say(text)
+            self.engine.runAndWait()
+        elif winsound is not None:
+            path, duration = audio
+            if self._interrupted.is_set():
+                return
+            winsound.PlaySound(path, winsound.SND_FILENAME | winsound.SND_ASYNC)
+            self._interrupted.wait(duration)  # cancel() stops the sound and wakes us early
+        else:
+            data, rate = audio
+            sd.play(data, rate)
+            sd.wait()
 
-            self.queue.task_done()
+
+# --------------------------------
+# Shared service for simple callers (web mode)
+# --------------------------------
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service():
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = VoiceService(preload=all_messages())
+        return _service
+
+
+def speak(text, category="info"):
+    return get_service().say(text, category)
+
+
+class VoiceManager:
+    """Cooldown wrapper around the shared VoiceService."""
+
+    def __init__(self, cooldown=10):
+        self.service = get_service()
+        self.cooldown = cooldown
+        self.last_spoken = 0
 
     def speak(self, text):
         now = time.time()
 
         if now - self.last_spoken >= self.cooldown:
-            self.queue.put(text)
-            self.last_spoken = now
\ No newline at end of file
+            self.service.say(text)
+            self.last_spoken = now